@@ -2,6 +2,9 @@
 자기소개서 생성 웹 API.
 
 - FastAPI 앱: POST /api/self-intro/generate 로 요청 받아 서비스 create_self_introduction 호출 후 응답 반환.
+- POST /api/self-intro/generate-batch: 여러 내담자 요청을 한 번에 받아 create_self_introductions_batch로 처리, 항목별 결과/오류 반환.
+- 생성 응답에는 단계별 소요 시간을 Server-Timing 헤더로 붙이고, GET /metrics 로 누적 히스토그램(Prometheus 텍스트)을 노출.
+- 응답 기한: body의 deadline_ms 또는 X-Request-Deadline-Ms 헤더(둘 다 있으면 짧은 쪽)를 서비스에 넘겨 단계별로 나눠 씀.
 - 요청/응답은 Pydantic 스키마로 검증. 내부적으로는 models.counseling / models.output 의 dataclass 로 변환해 사용.
 """
 
@@ -16,10 +19,16 @@ env_path = Path(__file__).resolve().parent.parent / ".env.local"
 if env_path.exists():
     load_dotenv(dotenv_path=env_path)
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
-from service import create_self_introduction
+from service import (
+    StageTimings,
+    create_self_introduction,
+    create_self_introductions_batch,
+    render_metrics,
+)
 from models.counseling import (
     CounselingContent,
     AIAnalysisResult,
@@ -68,7 +77,10 @@ class SelfIntroRequestSchema(BaseModel):
         description="작성 초점: strength(역량) / experience(경험) / values(가치관)",
     )
     rag_context: Optional[str] = Field(None, description="RAG 검색에서 추출한 추가 컨텍스트")
-
+    bypass_cache: bool = Field(False, description="True면 응답 캐시를 무시하고 새로 생성")
+    deadline_ms: Optional[int] = Field(
+        None, ge=100, le=600000, description="이 시간(ms) 안에 응답. 모자라면 LM/OpenAI 단계를 줄이거나 건너뜀"
+    )
 
 
 class SelfIntroResponseSchema(BaseModel):
@@ -78,6 +90,31 @@ class SelfIntroResponseSchema(BaseModel):
     reasoning: Optional[str] = Field(None, description="추론 과정")
     word_count: int = Field(0, description="생성된 글자 수")
     scoring: Optional[dict] = Field(None, description="적합도 스코어링 정보")
+    cached: bool = Field(False, description="응답 캐시에서 반환된 결과인지 여부")
+
+
+class SelfIntroBatchRequestSchema(BaseModel):
+    """자기소개서 일괄 생성 요청 스키마 (여러 내담자 요청 목록)"""
+
+    items: List[SelfIntroRequestSchema] = Field(..., min_length=1, max_length=100, description="생성 요청 목록 (최대 100건)")
+    max_concurrency: int = Field(4, ge=1, le=16, description="동시에 보낼 OpenAI 요청 수")
+    deadline_ms: Optional[int] = Field(None, ge=100, le=600000, description="배치 전체 응답 기한(ms)")
+
+
+class SelfIntroBatchItemSchema(BaseModel):
+    """일괄 생성 결과 한 건. 성공이면 result, 실패면 error가 채워짐."""
+
+    index: int = Field(..., description="요청 목록에서의 위치 (0부터)")
+    result: Optional[SelfIntroResponseSchema] = None
+    error: Optional[str] = None
+
+
+class SelfIntroBatchResponseSchema(BaseModel):
+    """자기소개서 일괄 생성 응답 스키마"""
+
+    items: List[SelfIntroBatchItemSchema]
+    succeeded: int = Field(0, description="성공 건수")
+    failed: int = Field(0, description="실패 건수")
 
 
 # --- FastAPI 앱 및 엔드포인트 ---
@@ -120,17 +157,11 @@ def _to_ai_analysis(a: AIAnalysisResultSchema) -> AIAnalysisResult:
     )
 
 
-@app.post(
-    "/api/self-intro/generate",
-    response_model=SelfIntroResponseSchema,
-    summary="자기소개서 초안 생성",
-    description="상담 컨텐츠와 AI 분석된 직무역량/추천분야를 바탕으로 자기소개서 초안을 생성합니다.",
-)
-def generate_self_intro(request: SelfIntroRequestSchema) -> SelfIntroResponseSchema:
-    """요청 스키마 → SelfIntroRequest 변환 후 create_self_introduction 호출, 응답 스키마로 반환. 검증 실패 시 400."""
+def _to_request(request: SelfIntroRequestSchema):
+    """Pydantic 요청 스키마 → SelfIntroRequest(dataclass) 변환."""
     from models.counseling import SelfIntroRequest
 
-    req = SelfIntroRequest(
+    return SelfIntroRequest(
         counseling=_to_counseling(request.counseling),
         ai_analysis=_to_ai_analysis(request.ai_analysis),
         language=request.language,
@@ -139,18 +170,93 @@ def generate_self_intro(request: SelfIntroRequestSchema) -> SelfIntroResponseSch
         rag_context=request.rag_context,
     )
 
+
+def _resolve_deadline_ms(body_ms: Optional[int], header_ms: Optional[int]) -> Optional[int]:
+    """body 필드와 X-Request-Deadline-Ms 헤더 중 설정된 값의 최솟값. 둘 다 없으면 None."""
+    values = [v for v in (body_ms, header_ms) if v is not None]
+    return min(values) if values else None
+
+
+def _to_response_schema(result: SelfIntroResponse) -> SelfIntroResponseSchema:
+    """SelfIntroResponse(dataclass) → 응답 스키마 변환."""
+    return SelfIntroResponseSchema(
+        draft=result.draft,
+        reasoning=result.reasoning,
+        word_count=result.word_count,
+        scoring=result.scoring,
+        cached=result.cached,
+    )
+
+
+@app.post(
+    "/api/self-intro/generate",
+    response_model=SelfIntroResponseSchema,
+    summary="자기소개서 초안 생성",
+    description="상담 컨텐츠와 AI 분석된 직무역량/추천분야를 바탕으로 자기소개서 초안을 생성합니다.",
+)
+def generate_self_intro(
+    request: SelfIntroRequestSchema,
+    response: Response,
+    x_request_deadline_ms: Optional[int] = Header(None, ge=100, le=600000),
+) -> SelfIntroResponseSchema:
+    """요청 스키마 → SelfIntroRequest 변환 후 create_self_introduction 호출, 응답 스키마로 반환. 검증 실패 시 400."""
+    req = _to_request(request)
+    timings = StageTimings()
+
     try:
-        result: SelfIntroResponse = create_self_introduction(req)
-        return SelfIntroResponseSchema(
-            draft=result.draft,
-            reasoning=result.reasoning,
-            word_count=result.word_count,
-            scoring=result.scoring,
+        result: SelfIntroResponse = create_self_introduction(
+            req,
+            use_cache=not request.bypass_cache,
+            timings=timings,
+            deadline_ms=_resolve_deadline_ms(request.deadline_ms, x_request_deadline_ms),
         )
+        response.headers["Server-Timing"] = timings.server_timing()
+        return _to_response_schema(result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post(
+    "/api/self-intro/generate-batch",
+    response_model=SelfIntroBatchResponseSchema,
+    summary="자기소개서 초안 일괄 생성",
+    description="여러 내담자의 요청을 한 번에 받아 초안을 생성합니다. 로컬 LM은 배치로, OpenAI는 제한된 동시성으로 호출하며 항목별 결과/오류를 반환합니다.",
+)
+def generate_self_intro_batch(
+    request: SelfIntroBatchRequestSchema,
+    response: Response,
+    x_request_deadline_ms: Optional[int] = Header(None, ge=100, le=600000),
+) -> SelfIntroBatchResponseSchema:
+    """항목별로 SelfIntroRequest 변환 후 create_self_introductions_batch 호출. 한 항목이 실패해도 나머지는 반환."""
+    reqs = [_to_request(item) for item in request.items]
+    timings = StageTimings()
+    # 항목별 bypass_cache·deadline_ms는 그 항목에만 적용 (deadline_ms는 배치 기한과 둘 중 이른 쪽)
+    results = create_self_introductions_batch(
+        reqs,
+        max_concurrency=request.max_concurrency,
+        use_cache=[not item.bypass_cache for item in request.items],
+        timings=timings,
+        deadline_ms=_resolve_deadline_ms(request.deadline_ms, x_request_deadline_ms),
+        item_deadline_ms=[item.deadline_ms for item in request.items],
+    )
+    response.headers["Server-Timing"] = timings.server_timing()
+
+    items: List[SelfIntroBatchItemSchema] = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            items.append(SelfIntroBatchItemSchema(index=i, error=str(result)))
+        else:
+            items.append(SelfIntroBatchItemSchema(index=i, result=_to_response_schema(result)))
+    failed = sum(1 for item in items if item.error is not None)
+    return SelfIntroBatchResponseSchema(items=items, succeeded=len(items) - failed, failed=failed)
+
+
+@app.get("/metrics", summary="단계별 지연 시간 메트릭", response_class=PlainTextResponse)
+def metrics() -> str:
+    """단계별 소요 시간 히스토그램과 토큰·요청 카운터 (Prometheus 텍스트 형식)."""
+    return render_metrics()
+
+
 @app.get("/health", summary="헬스 체크")
 def health():
     """서비스 상태 확인."""
@@ -3,22 +3,48 @@
 크롤링한 자기소개서 텍스트 파일을 파싱해서 (input, reference) 쌍으로 만듭니다.
 
 - 출력: JSONL. 각 줄 = {"input": {...}, "reference": "자기소개서 본문"}. train_resume_model.py의 입력으로 사용.
-- 모드 1) 메타만: 회사/직무/학교/전공 라인에서 roles, background 일부 추출 (규칙 기반).
+- 모드 1) 메타만: 직무·메타 라인·본문에서 KEYWORD_DICTIONARY(직무·역량·경험·자격증) 키워드를 Aho–Corasick 오토마톤으로
+  한 번에 찾아 roles, competencies, background 추출 (규칙 기반, --keywords JSON으로 사전 확장).
 - 모드 2) --use-llm: OpenAI로 본문에서 roles, competencies, background 역추출 (OPENAI_API_KEY 필요).
+  --concurrency개 요청을 동시에 보내고(공용 레이트 리미터 경유), 일시 오류는 백오프 후 재시도. 출력 순서는 크롤링 파일 순서와 같음.
+- LLM 추출 결과는 data/cache/crawl_extractions.sqlite3에 본문 해시 + 모델 + 프롬프트 버전별로 캐시.
+  메타 규칙만 바꿔 다시 돌릴 때는 이미 본 엔트리에 OpenAI를 다시 부르지 않음 (키가 없어도 캐시된 엔트리는 LLM 결과 사용).
+- 파싱 직후 본문 문자 shingle MinHash + LSH 밴딩으로 유사 중복(재게시·거의 같은 글)을 걸러 LLM 호출·학습 낭비를 줄임.
+  제거한 클러스터는 <출력>.dedup.json에 기록 (--dedup-threshold로 기준 조정, --no-dedup으로 끔).
+- 진행 상황을 <출력>.progress.json에 주기적으로 기록해, 중간에 끊겨도 다시 실행하면 끝난 엔트리는 건너뛰고 이어서 처리 (--no-resume으로 처음부터).
+- 입력으로 디렉터리나 glob 패턴을 주면 여러 크롤링 파일을 프로세스 풀(--workers)로 파싱해 파일마다 shard JSONL을 쓰고
+  shard 디렉터리의 manifest.json에 원본 파일·크기·수정 시각·레코드 수를 기록. --incremental이면 manifest에 없거나 바뀐 파일만 처리하고
+  입력에서 사라진 원본의 shard는 삭제. 유사 중복 리포트는 실행마다 shard 디렉터리의 dedup-<시각>.json.
+  train_resume_model.py --data에 shard 디렉터리를 그대로 넘기면 됨.
 
 사용법:
   python build_input_from_crawl.py [크롤링파일경로] [--output 출력.jsonl] [--use-llm]
   예: python build_input_from_crawl.py "C:\\Users\\SMHRD\\Desktop\\자기소개서크롤링100.txt" --output data/examples.jsonl
   예: python build_input_from_crawl.py "C:\\Users\\SMHRD\\Desktop\\자기소개서크롤링100.txt" --use-llm --output data/examples.jsonl
+  예: python build_input_from_crawl.py 크롤링.txt --use-llm --concurrency 16  # 끊기면 같은 명령으로 재실행하면 이어서 진행
+  예: python build_input_from_crawl.py "crawls/**/*.txt" --output data/examples_shards --incremental
 """
 from __future__ import annotations
 
 import argparse
+import functools
+import glob
+import hashlib
+import itertools
 import json
 import os
 import re
+import sqlite3
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import numpy as np
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 
@@ -38,116 +64,508 @@ def _default_crawl_path() -> Path:
 
 
 DEFAULT_OUTPUT = SCRIPT_DIR / "data" / "examples.jsonl"
+# 여러 파일 입력 시 --output을 안 주면 쓰는 shard 디렉터리
+DEFAULT_SHARD_DIR = SCRIPT_DIR / "data" / "examples_shards"
+SHARD_MANIFEST = "manifest.json"
+SHARD_MANIFEST_VERSION = 1
+# 이 엔트리 수마다 출력 flush + 진행 상황 저장
+_PROGRESS_EVERY = 20
+DEFAULT_EXTRACT_CACHE = SCRIPT_DIR.parent / "data" / "cache" / "crawl_extractions.sqlite3"
+# 추정 Jaccard 유사도가 이 값 이상이면 유사 중복으로 보고 제거
+DEFAULT_DEDUP_THRESHOLD = 0.8
 
 # 엔트리 시작 라인 패턴: "회사명 / 직무 / 2023 상반기" 형태
 ENTRY_HEADER_RE = re.compile(r"^([^/\n]+)\s*/\s*([^/]+)\s*/\s*(\d{4}\s*[상하]반기)\s*$")
 
 
-def parse_crawl_file(path: str | Path) -> list[dict]:
+def parse_crawl_file(path: str | Path) -> Iterator[dict]:
     """
-    크롤링 txt 파일을 읽어서 엔트리 리스트로 반환.
+    크롤링 txt 파일을 한 줄씩 읽으며 엔트리를 하나씩 내보내는 제너레이터 (파일 크기와 상관없이 메모리 일정).
     각 엔트리: company, job, period, header_line, meta_line(다음 줄: 학교/전공 등), body_text(본문).
-    본문 100자 미만이면 스킵.
+    본문 100자 미만이면 스킵. 파일이 없으면 호출 시점에 FileNotFoundError.
     """
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"파일 없음: {path}")
+    return _iter_crawl_entries(path)
 
-    text = path.read_text(encoding="utf-8")
-    lines = text.split("\n")
-
-    entries: list[dict] = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        m = ENTRY_HEADER_RE.match(line.strip())
-        if m:
-            company, job, period = m.group(1).strip(), m.group(2).strip(), m.group(3).strip()
-            meta_line = ""
-            if i + 1 < len(lines):
-                meta_line = lines[i + 1].strip()
-                i += 1
-            # 본문 수집: 다음 엔트리 헤더가 나오기 전까지
-            body_lines: list[str] = []
-            i += 1
-            while i < len(lines):
-                if ENTRY_HEADER_RE.match(lines[i].strip()):
-                    break
-                body_lines.append(lines[i])
-                i += 1
-            body_text = "\n".join(body_lines).strip()
-            # 본문이 너무 짧으면 스킵 (헤더만 있는 경우)
-            if len(body_text) < 100:
-                i += 1
+
+def _iter_crawl_entries(path: Path) -> Iterator[dict]:
+    """ENTRY_HEADER_RE 헤더를 만날 때마다 앞 엔트리를 완성해 yield. 헤더 바로 다음 줄은 메타 라인, 그 뒤 다음 헤더 전까지가 본문."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.rstrip("\n") for line in f)
+        header = None
+        body_lines: list[str] = []
+        for line in lines:
+            m = ENTRY_HEADER_RE.match(line.strip())
+            if not m:
+                if header is not None:
+                    body_lines.append(line)
                 continue
-            entries.append({
-                "company": company,
-                "job": job,
-                "period": period,
-                "header_line": line.strip(),
-                "meta_line": meta_line,
-                "body_text": body_text,
-            })
-            continue
-        i += 1
-    return entries
+            if header is not None:
+                entry = _make_entry(*header, body_lines)
+                if entry is not None:
+                    yield entry
+            header = (m, line.strip(), next(lines, "").strip())
+            body_lines = []
+        if header is not None:
+            entry = _make_entry(*header, body_lines)
+            if entry is not None:
+                yield entry
+
+
+def _parse_file_entries(path: str) -> list[dict]:
+    """프로세스 풀 작업 단위: 크롤링 파일 하나의 엔트리 전체 (제너레이터는 프로세스 경계를 넘길 수 없어 리스트로)."""
+    return list(parse_crawl_file(path))
+
+
+def _is_multi_source(spec: str) -> bool:
+    return Path(spec).expanduser().is_dir() or any(c in spec for c in "*?[")
+
+
+def resolve_crawl_paths(spec: str) -> list[Path]:
+    """크롤링 입력 지정값 → 파일 목록 (정렬). 디렉터리면 하위의 *.txt 전체, glob 패턴이면 매칭 파일(** 지원), 아니면 그 파일 하나."""
+    p = Path(spec).expanduser()
+    if p.is_dir():
+        return sorted(q for q in p.rglob("*.txt") if q.is_file())
+    if any(c in spec for c in "*?["):
+        return sorted(Path(q) for q in glob.glob(os.path.expanduser(spec), recursive=True) if Path(q).is_file())
+    return [p]
+
+
+def _make_entry(m: re.Match, header_line: str, meta_line: str, body_lines: list[str]) -> dict | None:
+    """헤더 매치·메타 라인·본문 줄로 엔트리 dict 생성. 본문이 너무 짧으면(헤더만 있는 경우) None."""
+    body_text = "\n".join(body_lines).strip()
+    if len(body_text) < 100:
+        return None
+    return {
+        "company": m.group(1).strip(),
+        "job": m.group(2).strip(),
+        "period": m.group(3).strip(),
+        "header_line": header_line,
+        "meta_line": meta_line,
+        "body_text": body_text,
+    }
+
+
+def _import_numpy():
+    """유사 중복 제거에서만 쓰는 numpy를 필요할 때 import (메타데이터만 만들 때는 표준 라이브러리만으로 동작)."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("유사 중복 제거에는 numpy가 필요합니다. 'pip install numpy'를 실행하거나 --no-dedup을 쓰세요.")
+    return numpy
+
+
+class NearDuplicateFilter:
+    """
+    본문 문자 shingle MinHash + LSH 밴딩 기반 유사 중복 제거. 엔트리 수에 대해 거의 선형.
+    - 본문은 공백을 모두 지운 뒤 shingle자 단위 shingle로 쪼개고, num_perm개 해시 순열의 최솟값으로 서명 생성.
+    - 서명을 bands개 밴드로 나눠 밴드가 하나라도 같은 이전 대표 엔트리만 후보로 보고, 서명 일치 비율(추정 Jaccard)이
+      threshold 이상이면 그 대표의 클러스터에 넣고 제거. 먼저 나온 엔트리가 대표로 남음 (입력 순서 기준이라 결과 결정적).
+    - 대표 엔트리의 서명·밴드만 메모리에 유지.
+    - add()는 이미 저장된 엔트리(증분 빌드의 기존 shard)를 비교 대상으로만 색인하며 seen/removed/클러스터에 세지 않음.
+      이 엔트리들은 -1, -2, …의 음수 인덱스를 받아 이번 실행의 인덱스(0부터)와 겹치지 않음.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        *,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})로 나누어떨어져야 합니다.")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self._np = np = _import_numpy()
+        self._prime = np.uint64((1 << 61) - 1)
+        self._mask = np.uint64(0xFFFFFFFF)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._buckets: list[dict[bytes, int]] = [{} for _ in range(bands)]
+        self._signatures: dict[int, np.ndarray] = {}
+        self._headers: dict[int, str] = {}
+        self._sources: dict[int, str] = {}
+        self.clusters: dict[int, list[dict]] = {}
+        self.seen = 0
+        self.removed = 0
+        self._indexed = 0
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        """공백 제거 후 연속 shingle자 다항 해시를 벡터 연산으로 계산해 32비트로 접은 고유값 배열."""
+        np = self._np
+        text = re.sub(r"\s+", "", text)
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = min(self.shingle, len(codes)) or 1
+        n = max(len(codes) - k + 1, 1)
+        h = np.zeros(n, dtype=np.uint64)
+        for i in range(k):
+            h = h * np.uint64(1000003) + (codes[i : i + n] if len(codes) else np.zeros(n, dtype=np.uint64))
+        return np.unique((h ^ (h >> np.uint64(32))) & self._mask)
+
+    def signature(self, text: str) -> np.ndarray:
+        """num_perm개 (a*x + b) mod p 순열의 shingle 최솟값 (uint32 배열)."""
+        h = self._shingle_hashes(text)
+        return (((self._a * h + self._b) % self._prime) & self._mask).min(axis=1).astype(self._np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> list[bytes]:
+        return [sig[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, index: int, sig: np.ndarray, keys: list[bytes], entry: dict, source: str | None) -> None:
+        self._signatures[index] = sig
+        self._headers[index] = entry.get("header_line", "")
+        if source is not None:
+            self._sources[index] = source
+        for i, key in enumerate(keys):
+            self._buckets[i].setdefault(key, index)
+
+    def add(self, entry: dict, source: str | None = None) -> None:
+        """중복 판정 없이 대표로 색인만 (이후 엔트리의 비교 대상). 통계·클러스터에는 남기지 않음."""
+        self._indexed += 1
+        sig = self.signature(entry.get("body_text", ""))
+        self._insert(-self._indexed, sig, self._band_keys(sig), entry, source)
+
+    def check(self, index: int, entry: dict, source: str | None = None) -> bool:
+        """엔트리를 색인하고 남길지 반환. 기존 대표와 유사 중복이면 클러스터에 기록하고 False. source(원본 파일)는 리포트에만 씀."""
+        self.seen += 1
+        sig = self.signature(entry.get("body_text", ""))
+        keys = self._band_keys(sig)
+        candidates = {self._buckets[i][key] for i, key in enumerate(keys) if key in self._buckets[i]}
+        best, best_sim = None, 0.0
+        for cand in candidates:
+            sim = float((self._signatures[cand] == sig).mean())
+            if sim > best_sim:
+                best, best_sim = cand, sim
+        if best is not None and best_sim >= self.threshold:
+            self.removed += 1
+            dup = {"index": index, "header_line": entry.get("header_line", ""), "similarity": round(best_sim, 3)}
+            if source is not None:
+                dup["source"] = source
+            self.clusters.setdefault(best, []).append(dup)
+            return False
+        self._insert(index, sig, keys, entry, source)
+        return True
+
+    def filter(self, entries: Iterable[dict], source: str | None = None) -> Iterator[dict]:
+        """입력 순서대로 대표(처음 나온) 엔트리만 내보내는 제너레이터. 인덱스는 지금까지 본 엔트리 수에 이어서 매김."""
+        for entry in entries:
+            if self.check(self.seen, entry, source):
+                yield entry
+
+    def report(self) -> dict:
+        """제거 통계와 클러스터(남긴 대표 + 제거된 엔트리, 유사도, 원본 파일) 목록."""
+
+        def _kept(rep: int) -> dict:
+            kept = {"index": rep, "header_line": self._headers[rep]}
+            if rep in self._sources:
+                kept["source"] = self._sources[rep]
+            return kept
+
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.rows * self.bands,
+            "bands": self.bands,
+            "shingle": self.shingle,
+            "entries": self.seen,
+            "removed": self.removed,
+            "clusters": [
+                {"kept": _kept(rep), "removed": dups}
+                for rep, dups in sorted(self.clusters.items())
+            ],
+        }
+
+
+def _dedup_report_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".dedup.json")
+
+
+# 직무 키워드 → 기본 역량. 직무 문자열에서 매칭된 직무 키워드의 역량을 등장 순서대로 합침
+ROLE_COMPETENCIES: dict[str, list[str]] = {
+    "마케팅": ["마케팅", "데이터 분석", "커뮤니케이션"],
+    "기획": ["기획", "커뮤니케이션", "문제해결"],
+    "영업": ["영업", "커뮤니케이션", "협업"],
+    "디지털": ["디지털", "데이터 분석", "커뮤니케이션"],
+    "PD": ["기획", "커뮤니케이션", "협업"],
+    "엔지니어": ["문제해결", "기술", "협업"],
+    "반도체": ["기술", "문제해결", "협업"],
+    "금융": ["분석", "커뮤니케이션", "문제해결"],
+    "재무": ["재무", "분석", "문제해결"],
+    "품질": ["품질관리", "문제해결", "협업"],
+    "IT": ["기술", "문제해결", "협업"],
+    "인사": ["인사", "커뮤니케이션", "협업"],
+    "연구개발": ["기술", "분석", "문제해결"],
+}
+
+# 규칙 기반 추출용 키워드 사전: 분류 → {본문에 나오는 표현: 표준 라벨}. 항목을 추가하거나 --keywords JSON으로 확장
+# (role 라벨은 ROLE_COMPETENCIES 키). 영문 약어는 대소문자를 구분함.
+# role은 직무 문자열에만, 나머지는 메타 라인·본문에만 적용. 회사명·일반 단어에 흔히 들어가는 짧은 표현(토스, 수상, 공정, 개발 등)은
+# 오탐이 나므로 더 긴 표현으로 등록.
+KEYWORD_DICTIONARY: dict[str, dict[str, str]] = {
+    "role": {
+        **{key: key for key in ROLE_COMPETENCIES},
+        "브랜드": "마케팅",
+        "홍보": "마케팅",
+        "전략기획": "기획",
+        "세일즈": "영업",
+        "설계": "엔지니어",
+        "공정기술": "엔지니어",
+        "공정 엔지니어": "엔지니어",
+        "생산기술": "엔지니어",
+        "은행": "금융",
+        "증권": "금융",
+        "보험": "금융",
+        "회계": "재무",
+        "QA": "품질",
+        "개발자": "IT",
+        "SW개발": "IT",
+        "SW 개발": "IT",
+        "백엔드": "IT",
+        "프론트엔드": "IT",
+        "소프트웨어": "IT",
+        "SW": "IT",
+        "HR": "인사",
+        "R&D": "연구개발",
+        "연구원": "연구개발",
+    },
+    "competency": {
+        "커뮤니케이션": "커뮤니케이션",
+        "소통": "커뮤니케이션",
+        "협업": "협업",
+        "팀워크": "협업",
+        "협력": "협업",
+        "문제해결": "문제해결",
+        "문제 해결": "문제해결",
+        "데이터 분석": "데이터 분석",
+        "데이터분석": "데이터 분석",
+        "분석력": "분석",
+        "기획력": "기획",
+        "리더십": "리더십",
+        "논리적": "논리적 사고",
+        "창의": "창의성",
+        "도전": "도전정신",
+        "책임감": "책임감",
+        "성실": "성실성",
+        "꼼꼼": "꼼꼼함",
+        "고객 중심": "고객 지향",
+        "고객중심": "고객 지향",
+        "글로벌": "글로벌 역량",
+        "외국어": "글로벌 역량",
+        "전문성": "전문성",
+        "적응력": "적응력",
+    },
+    "experience": {
+        "인턴": "인턴 경험",
+        "공모전": "공모전 수상",
+        "현장실습": "현장실습",
+        "동아리": "동아리 활동",
+        "학생회": "학생회 활동",
+        "대외활동": "대외활동",
+        "서포터즈": "대외활동",
+        "봉사": "봉사 활동",
+        "교환학생": "교환학생",
+        "어학연수": "어학연수",
+        "아르바이트": "아르바이트 경험",
+        "프로젝트": "프로젝트 경험",
+        "학부연구생": "연구 경험",
+        "연구실": "연구 경험",
+        "창업": "창업 경험",
+        "수상 경력": "수상 경력",
+        "수상경력": "수상 경력",
+        "수상했": "수상 경력",
+    },
+    "certification": {
+        "토익스피킹": "토익스피킹",
+        "토스 스피킹": "토익스피킹",
+        "토익": "토익",
+        "TOEIC": "토익",
+        "오픽": "OPIc",
+        "OPIc": "OPIc",
+        "OPIC": "OPIc",
+        "HSK": "HSK",
+        "JLPT": "JLPT",
+        "JPT": "JPT",
+        "정보처리기사": "정보처리기사",
+        "컴활": "컴퓨터활용능력",
+        "컴퓨터활용능력": "컴퓨터활용능력",
+        "한국사": "한국사능력검정",
+        "ADsP": "ADsP",
+        "SQLD": "SQLD",
+        "빅데이터분석기사": "빅데이터분석기사",
+        "전산회계": "전산회계",
+        "재경관리사": "재경관리사",
+        "회계관리": "회계관리",
+        "투자자산운용사": "투자자산운용사",
+        "AFPK": "AFPK",
+        "CFA": "CFA",
+        "CPA": "CPA",
+        "품질경영기사": "품질경영기사",
+        "전기기사": "전기기사",
+        "6시그마": "6시그마",
+        "식스시그마": "6시그마",
+        "GTQ": "GTQ",
+    },
+}
+# 직무 문자열에 적용하는 분류 / 메타 라인·본문에 적용하는 분류
+_JOB_CATEGORIES = ("role",)
+_ENTRY_CATEGORIES = ("competency", "experience", "certification")
+# 메타데이터 규칙으로 만드는 input의 역량·경험 최대 개수 (프롬프트가 너무 길어지지 않게)
+_MAX_COMPETENCIES = 5
+_MAX_EXPERIENCES = 6
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick 다중 패턴 매처. 키워드 사전 전체를 트라이 + 실패 링크 오토마톤으로 한 번 컴파일해 두고,
+    텍스트를 한 번 훑으며(텍스트 길이 + 매치 수에 선형) 모든 분류의 키워드 매치를 찾음.
+    iter_matches는 겹치는 매치까지 전부, find는 leftmost-longest로 겹치지 않는 매치만 셈 ('토익스피킹' 안의 '토익'은 버림).
+    """
+
+    def __init__(self, dictionary: dict[str, dict[str, str]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str, str]]] = [[]]
+        for category, keywords in dictionary.items():
+            for keyword, label in keywords.items():
+                state = 0
+                for ch in keyword:
+                    nxt = self._goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[state][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                    state = nxt
+                if keyword and (len(keyword), category, label) not in self._out[state]:
+                    self._out[state].append((len(keyword), category, label))
+        # BFS로 실패 링크: 현재 상태 문자열의 가장 긴 진접미사에 해당하는 상태. 출력도 실패 링크를 따라 합침
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, str, str]]:
+        """겹치는 것을 포함한 모든 매치 (시작, 끝(미포함), 분류, 라벨)을 끝 위치 순서대로 내보냄."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, category, label in out[state]:
+                yield i + 1 - length, i + 1, category, label
+
+    def find(self, text: str) -> dict[str, dict[str, int]]:
+        """
+        분류 → {라벨: 등장 횟수} (라벨은 처음 등장한 순서). 가장 왼쪽에서 시작하는 가장 긴 매치를 고르고
+        그 구간과 겹치는 매치는 버림 (같은 구간에 여러 분류가 걸리면 모두 셈).
+        """
+        found: dict[str, dict[str, int]] = {}
+        last_end = 0
+        chosen = None
+        for start, end, category, label in sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1])):
+            if (start, end) != chosen:
+                if start < last_end:
+                    continue
+                chosen, last_end = (start, end), end
+            counts = found.setdefault(category, {})
+            counts[label] = counts.get(label, 0) + 1
+        return found
+
+
+_keyword_matchers: dict[tuple[str, ...], KeywordMatcher] = {}
+
+
+def get_keyword_matcher(categories: tuple[str, ...] = _ENTRY_CATEGORIES) -> KeywordMatcher:
+    """KEYWORD_DICTIONARY의 categories 분류로 컴파일한 공용 매처 (분류 조합마다 처음 쓸 때 한 번 빌드)."""
+    matcher = _keyword_matchers.get(categories)
+    if matcher is None:
+        matcher = KeywordMatcher({c: KEYWORD_DICTIONARY.get(c, {}) for c in categories})
+        _keyword_matchers[categories] = matcher
+    return matcher
+
+
+def extend_keywords(extra: dict[str, dict[str, str]]) -> None:
+    """KEYWORD_DICTIONARY에 분류별 {표현: 라벨}을 더하고 공용 매처를 다시 빌드하게 함. role 라벨은 ROLE_COMPETENCIES 키여야 역량으로 이어짐."""
+    for category, keywords in extra.items():
+        KEYWORD_DICTIONARY.setdefault(category, {}).update(keywords)
+    _keyword_matchers.clear()
 
 
 def parse_meta_line(meta_line: str) -> dict:
-    """메타 라인에서 학교, 전공, 학점 등 추출. 형식: 학교 / 학과 / 학점 4.1/4.5 / ... '인턴','공모전' 등 키워드로 experiences 리스트 생성."""
+    """
+    메타 라인에서 학교, 전공, 학점 등 추출. 형식: 학교 / 학과 / 학점 4.1/4.5 / ...
+    학교·학과 뒤 부분에서 키워드 매처로 experiences('인턴 경험', '공모전 수상' 등)와 certifications(토익, 정보처리기사 등) 추출.
+    """
     parts = [p.strip() for p in meta_line.split("/")]
     school = parts[0] if parts else ""
     major = parts[1] if len(parts) > 1 else ""
     education = f"{school} {major}".strip() or "관련 전공"
-    # 나머지에서 인턴/경험 키워드 추출
     rest = " ".join(parts[2:]) if len(parts) > 2 else ""
-    experiences: list[str] = []
-    if "인턴" in rest:
-        experiences.append("인턴 경험")
-    if "공모전" in rest:
-        experiences.append("공모전 수상")
-    return {"education": education, "experiences": experiences, "raw": meta_line}
+    found = get_keyword_matcher().find(rest)
+    return {
+        "education": education,
+        "experiences": list(found.get("experience", {})),
+        "certifications": list(found.get("certification", {})),
+        "raw": meta_line,
+    }
 
 
 def job_to_roles_and_competencies(job: str) -> tuple[list[str], list[str]]:
-    """직무 문자열에서 roles 1개, competencies 리스트 추출. 마케팅/기획/영업 등 키워드로 comp_map에서 역량 매핑."""
+    """직무 문자열에서 roles 1개, competencies 리스트 추출. 매칭된 직무 키워드(마케팅/기획/영업 등)의 ROLE_COMPETENCIES를 등장 순서대로 합침."""
     role = job.split("(")[0].split("_")[0].strip()
     if not role:
         role = "일반직"
     roles = [role]
 
-    comp_map = {
-        "마케팅": ["마케팅", "데이터 분석", "커뮤니케이션"],
-        "기획": ["기획", "커뮤니케이션", "문제해결"],
-        "영업": ["영업", "커뮤니케이션", "협업"],
-        "디지털": ["디지털", "데이터 분석", "커뮤니케이션"],
-        "PD": ["기획", "커뮤니케이션", "협업"],
-        "엔지니어": ["문제해결", "기술", "협업"],
-        "반도체": ["기술", "문제해결", "협업"],
-        "금융": ["분석", "커뮤니케이션", "문제해결"],
-        "재무": ["재무", "분석", "문제해결"],
-        "품질": ["품질관리", "문제해결", "협업"],
-        "IT": ["기술", "문제해결", "협업"],
-    }
-    competencies = ["커뮤니케이션", "문제해결"]
-    for key, comps in comp_map.items():
-        if key in job or key in role:
-            competencies = comps
-            break
-    return roles, competencies
+    competencies: list[str] = []
+    for role_key in get_keyword_matcher(_JOB_CATEGORIES).find(job).get("role", {}):
+        for comp in ROLE_COMPETENCIES.get(role_key, []):
+            if comp not in competencies:
+                competencies.append(comp)
+    return roles, competencies[:_MAX_COMPETENCIES] or ["커뮤니케이션", "문제해결"]
 
 
 def build_input_from_metadata(entry: dict) -> dict:
-    """엔트리에서 메타데이터만으로 input dict 생성. roles, competencies, background, language, focus. train/examples 형식과 호환."""
+    """
+    엔트리에서 LLM 없이 규칙으로 input dict 생성. roles, competencies, background, language, focus. train/examples 형식과 호환.
+    직무 기반 역량 뒤에 본문에서 자주 나온 역량 키워드를, 메타 라인 경험·자격 뒤에 본문에서 찾은 경험·자격을 덧붙임.
+    """
     meta = parse_meta_line(entry.get("meta_line", ""))
     roles, competencies = job_to_roles_and_competencies(entry.get("job", ""))
+    body = get_keyword_matcher().find(entry.get("body_text", ""))
+    body_comps = sorted(body.get("competency", {}).items(), key=lambda kv: -kv[1])
+    for comp, _ in body_comps:
+        if len(competencies) >= _MAX_COMPETENCIES:
+            break
+        if comp not in competencies:
+            competencies.append(comp)
+    experiences: list[str] = []
+    for exp in itertools.chain(
+        meta["experiences"], meta["certifications"], body.get("experience", {}), body.get("certification", {})
+    ):
+        if exp not in experiences:
+            experiences.append(exp)
     return {
         "roles": roles,
         "competencies": competencies,
         "background": {
             "name": None,
             "education": meta.get("education") or "관련 전공",
-            "experiences": meta.get("experiences") or [],
+            "experiences": experiences[:_MAX_EXPERIENCES],
             "strengths": competencies[:2],
             "career_values": None,
         },
@@ -156,8 +574,86 @@ def build_input_from_metadata(entry: dict) -> dict:
     }
 
 
-def extract_input_with_openai(entry: dict) -> dict | None:
-    """OpenAI API로 본문(body_text)에서 roles, competencies, background JSON 역추출. 실패/키 없으면 None, 그러면 build_input_from_metadata 사용."""
+EXTRACT_PROMPT = """다음은 채용 자기소개서 본문입니다. 아래 JSON 형식으로만 답하세요. 다른 설명 금지.
+- roles: 지원 직무 1~2개 (한글, 예: ["마케팅", "기획"])
+- competencies: 직무 역량 3~5개 (한글, 예: ["마케팅", "데이터 분석", "커뮤니케이션"])
+- background: { "name": null, "education": "전공/학교 요약", "experiences": ["경험1","경험2"], "strengths": ["강점1","강점2"], "career_values": "가치관 한 줄 또는 null" }
+
+자기소개서 본문:
+"""
+
+
+# EXTRACT_PROMPT나 _parse_extraction 결과 형식을 바꾸면 올려서 이전 추출 캐시를 쓰지 않게 함
+# (2: 엔트리별 기본값을 채우기 전의 추출 JSON 원본을 캐시)
+EXTRACT_PROMPT_VERSION = 2
+
+
+def _extract_model() -> str:
+    return os.environ.get("OPENAI_EXTRACT_MODEL", "gpt-4o-mini")
+
+
+class ExtractionCache:
+    """
+    LLM 추출 결과(모델이 돌려준 JSON 원본) SQLite 캐시. 키는 SHA-256(body_text[:6000]) + 추출 모델 + EXTRACT_PROMPT_VERSION.
+    --use-llm 추출을 여러 스레드가 동시에 하므로 모든 접근은 lock으로 직렬화. 열 수 없으면 캐시 없이 동작.
+    """
+
+    def __init__(self, sqlite_path: Path):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        try:
+            sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "body_sha256 TEXT, model TEXT, prompt_version INTEGER, created_at REAL, payload TEXT, "
+                "PRIMARY KEY (body_sha256, model, prompt_version))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[build_input] 추출 캐시 비활성화: {e}", file=sys.stderr)
+            self._db = None
+
+    @staticmethod
+    def body_key(body: str) -> str:
+        return hashlib.sha256(body[:6000].encode("utf-8")).hexdigest()
+
+    def get(self, body: str, model: str) -> dict | None:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM extractions WHERE body_sha256 = ? AND model = ? AND prompt_version = ?",
+                (self.body_key(body), model, EXTRACT_PROMPT_VERSION),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, body: str, model: str, payload: dict) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (body_sha256, model, prompt_version, created_at, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.body_key(body), model, EXTRACT_PROMPT_VERSION, time.time(), json.dumps(payload, ensure_ascii=False)),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+
+def make_openai_client():
+    """OPENAI_API_KEY가 있으면 OpenAI 클라이언트 (재시도는 공용 리미터가 하므로 max_retries=0), 없거나 openai 미설치면 None."""
     try:
         from openai import OpenAI
     except ImportError:
@@ -165,26 +661,14 @@ def extract_input_with_openai(entry: dict) -> dict | None:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         return None
+    return OpenAI(api_key=api_key, max_retries=0)
 
-    body = (entry.get("body_text") or "")[:6000]
-    if not body:
-        return None
-
-    client = OpenAI(api_key=api_key)
-    prompt = """다음은 채용 자기소개서 본문입니다. 아래 JSON 형식으로만 답하세요. 다른 설명 금지.
-- roles: 지원 직무 1~2개 (한글, 예: ["마케팅", "기획"])
-- competencies: 직무 역량 3~5개 (한글, 예: ["마케팅", "데이터 분석", "커뮤니케이션"])
-- background: { "name": null, "education": "전공/학교 요약", "experiences": ["경험1","경험2"], "strengths": ["강점1","강점2"], "career_values": "가치관 한 줄 또는 null" }
 
-자기소개서 본문:
-"""
+def _parse_extraction(text: str) -> dict | None:
+    """모델 응답(JSON 또는 ```json 블록)에서 JSON 객체만 꺼냄 (엔트리와 무관한 원본, 캐시에 이대로 저장). JSON이 없거나 깨졌으면 None."""
+    text = (text or "").strip()
+    data = None
     try:
-        resp = client.chat.completions.create(
-            model=os.environ.get("OPENAI_EXTRACT_MODEL", "gpt-4o-mini"),
-            messages=[{"role": "user", "content": prompt + body}],
-            temperature=0,
-        )
-        text = (resp.choices[0].message.content or "").strip()
         # JSON 블록만 추출
         if "```" in text:
             for part in text.split("```"):
@@ -196,25 +680,326 @@ def extract_input_with_openai(entry: dict) -> dict | None:
                     break
         else:
             data = json.loads(text)
-        # 우리 input 형식으로
-        roles = data.get("roles") or [entry.get("job", "일반직").split("(")[0].strip()]
-        competencies = data.get("competencies") or ["커뮤니케이션", "문제해결"]
-        bg = data.get("background") or {}
-        return {
-            "roles": roles if isinstance(roles, list) else [roles],
-            "competencies": competencies if isinstance(competencies, list) else [competencies],
-            "background": {
-                "name": bg.get("name"),
-                "education": bg.get("education") or "관련 전공",
-                "experiences": bg.get("experiences") or [],
-                "strengths": bg.get("strengths") or competencies[:2],
-                "career_values": bg.get("career_values"),
-            },
-            "language": "ko",
-            "focus": "strength",
-        }
-    except Exception:
+    except json.JSONDecodeError:
         return None
+    return data if isinstance(data, dict) else None
+
+
+def _extraction_to_input(data: dict, entry: dict) -> dict:
+    """추출 JSON → input dict. 빠진 roles는 이 엔트리의 직무, competencies·strengths 등은 기본값으로 채움 (캐시 조회 뒤 엔트리마다 적용)."""
+    roles = data.get("roles") or [entry.get("job", "일반직").split("(")[0].strip()]
+    competencies = data.get("competencies") or ["커뮤니케이션", "문제해결"]
+    bg = data.get("background") or {}
+    return {
+        "roles": roles if isinstance(roles, list) else [roles],
+        "competencies": competencies if isinstance(competencies, list) else [competencies],
+        "background": {
+            "name": bg.get("name"),
+            "education": bg.get("education") or "관련 전공",
+            "experiences": bg.get("experiences") or [],
+            "strengths": bg.get("strengths") or competencies[:2],
+            "career_values": bg.get("career_values"),
+        },
+        "language": "ko",
+        "focus": "strength",
+    }
+
+
+def extract_input_with_openai(
+    entry: dict, client=None, *, retries: int = 2, cache: ExtractionCache | None = None
+) -> dict | None:
+    """
+    OpenAI API로 본문(body_text)에서 roles, competencies, background JSON 역추출. 실패/키 없으면 None, 그러면 build_input_from_metadata 사용.
+    client를 넘기면 재사용 (여러 엔트리를 처리할 때 연결 풀 공유). 429(retry-after 준수)와 일시 오류(연결·타임아웃·5xx)는
+    공용 리미터가 지수 백오프(지터 포함)로 최대 retries번 재시도.
+    cache가 있으면 먼저 조회하고(키 없이도 동작), 새로 추출에 성공한 JSON 원본만 저장.
+    캐시 키가 본문뿐이므로 엔트리별 기본값(직무 등)은 조회 뒤에 채움.
+    """
+    body = (entry.get("body_text") or "")[:6000]
+    if not body:
+        return None
+    model = _extract_model()
+    if cache is not None:
+        cached = cache.get(body, model)
+        if cached is not None:
+            return _extraction_to_input(cached, entry)
+    if client is None:
+        client = make_openai_client()
+        if client is None:
+            return None
+
+    from openai_generator import estimate_tokens, get_openai_limiter
+
+    try:
+        resp = get_openai_limiter().call(
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": EXTRACT_PROMPT + body}],
+                temperature=0,
+            ),
+            est_tokens=estimate_tokens(EXTRACT_PROMPT, body, completion_tokens=400),
+            max_retries=retries,
+        )
+        data = _parse_extraction(resp.choices[0].message.content)
+    except Exception as e:
+        print(f"[build_input] OpenAI 추출 실패, 메타데이터 사용 ({entry.get('header_line', '')}): {e}", file=sys.stderr)
+        return None
+    if data is None:
+        return None
+    if cache is not None:
+        cache.set(body, model, data)
+    return _extraction_to_input(data, entry)
+
+
+def build_record(
+    entry: dict, *, client=None, use_llm: bool = False, cache: ExtractionCache | None = None
+) -> dict | None:
+    """엔트리 → {"input", "reference"} 레코드. 본문 50자 미만이면 None. LLM 추출이 실패하면 메타데이터 규칙으로 대체."""
+    ref = entry.get("body_text", "")
+    if len(ref) < 50:
+        return None
+    inp = extract_input_with_openai(entry, client, cache=cache) if use_llm else None
+    if inp is None:
+        inp = build_input_from_metadata(entry)
+    return {"input": inp, "reference": ref}
+
+
+def _ordered_map(fn: Callable, items: Iterable, concurrency: int, *, executor: type = ThreadPoolExecutor) -> Iterator:
+    """
+    items에 fn을 최대 concurrency개 스레드(executor=ProcessPoolExecutor면 프로세스)로 동시에 적용하되 결과는 입력 순서대로 내보냄.
+    앞서 제출해 두는 작업을 concurrency*2개로 제한해 items가 아무리 길어도 메모리는 일정.
+    """
+    if concurrency <= 1:
+        yield from map(fn, items)
+        return
+    with executor(max_workers=concurrency) as pool:
+        window: deque = deque()
+        for item in items:
+            window.append(pool.submit(fn, item))
+            if len(window) >= concurrency * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def _progress_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".progress.json")
+
+
+def _source_stat(crawl_path: Path) -> dict:
+    """입력 파일 식별값 (절대 경로·크기·수정 시각). 바뀌었는지 판단하는 데 씀."""
+    stat = crawl_path.stat()
+    return {
+        "source": str(crawl_path.resolve()),
+        "source_bytes": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _source_fingerprint(crawl_path: Path, use_llm: bool, dedup_threshold: float | None = None) -> dict:
+    """이어서 처리해도 되는지 판단하는 입력 식별값 (파일 경로·크기·수정 시각, LLM 사용 여부, 중복 제거 기준)."""
+    return {**_source_stat(crawl_path), "use_llm": bool(use_llm), "dedup_threshold": dedup_threshold}
+
+
+def _load_progress(out_path: Path, fingerprint: dict) -> dict | None:
+    """같은 입력으로 중단된 진행 기록이 있고 출력 파일이 그 지점까지 남아 있으면 반환, 아니면 None."""
+    path = _progress_path(out_path)
+    if not path.exists() or not out_path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            progress = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if progress.get("fingerprint") != fingerprint or out_path.stat().st_size < progress.get("output_bytes", 0):
+        print("진행 기록이 현재 입력과 맞지 않아 처음부터 처리합니다.", file=sys.stderr)
+        return None
+    return progress
+
+
+def _save_progress(out_path: Path, fingerprint: dict, entries_done: int, written: int, output_bytes: int) -> None:
+    """진행 기록을 임시 파일에 쓴 뒤 교체 (쓰는 도중 죽어도 이전 기록은 온전)."""
+    path = _progress_path(out_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"fingerprint": fingerprint, "entries_done": entries_done, "written": written, "output_bytes": output_bytes},
+            f,
+            ensure_ascii=False,
+        )
+    os.replace(tmp, path)
+
+
+def _load_shard_manifest(shard_dir: Path) -> dict | None:
+    path = shard_dir / SHARD_MANIFEST
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == SHARD_MANIFEST_VERSION else None
+
+
+def _save_shard_manifest(shard_dir: Path, manifest: dict) -> None:
+    """manifest를 임시 파일에 쓴 뒤 교체 (shard 하나를 끝낼 때마다 저장하므로 중간에 끊겨도 끝난 파일은 기록이 남음)."""
+    path = shard_dir / SHARD_MANIFEST
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def build_shards(
+    paths: list[Path],
+    shard_dir: Path,
+    build: Callable[[dict], dict | None],
+    *,
+    settings: dict,
+    dedup: NearDuplicateFilter | None = None,
+    workers: int = 4,
+    concurrency: int = 1,
+    incremental: bool = False,
+    max_entries: int = 0,
+) -> dict:
+    """
+    크롤링 파일마다 shard JSONL 하나(shard-00000.jsonl ...)를 쓰고 shard_dir/manifest.json을 갱신해 반환.
+    - 파싱은 workers개 프로세스에서 파일 단위로, 레코드 생성(build)은 파일 순서대로 concurrency개 스레드로.
+    - incremental이면 manifest에 같은 경로·크기·수정 시각으로 있는 파일은 건너뛰고, 바뀐 파일은 같은 shard를 다시 씀.
+      settings(use_llm, dedup_threshold)가 기존 manifest와 다르거나 incremental이 아니면 기존 shard를 지우고 전부 다시 만듦.
+    - incremental이면 paths에 더는 없는(크롤링에서 지워진) 원본의 shard는 지우고 manifest에서 뺌.
+    - dedup이 있으면 남겨 둔 기존 shard 본문도 먼저 색인해 새 파일의 중복을 shard 사이에서도 걸러 냄.
+      이번 실행의 제거 클러스터는 실행마다 따로 dedup-<시각>.json에 쓰고, 이번에 쓴 shard의 dedup_report에 그 이름을 기록
+      (이전 실행 리포트는 그 리포트를 가리키는 shard가 남아 있는 동안 유지).
+    """
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_shard_manifest(shard_dir)
+    if manifest is not None and (not incremental or any(manifest.get(k) != v for k, v in settings.items())):
+        if incremental:
+            print("기존 manifest와 설정(use_llm, dedup_threshold)이 달라 전체를 다시 만듭니다.", file=sys.stderr)
+        for shard in manifest["shards"]:
+            (shard_dir / shard["file"]).unlink(missing_ok=True)
+        manifest = None
+    if manifest is None:
+        manifest = {"version": SHARD_MANIFEST_VERSION, **settings, "next_shard": 0, "records": 0, "shards": []}
+
+    wanted = {str(p.resolve()) for p in paths}
+    stale = [shard for shard in manifest["shards"] if shard["source"] not in wanted]
+    for shard in stale:
+        (shard_dir / shard["file"]).unlink(missing_ok=True)
+        manifest["shards"].remove(shard)
+    if stale:
+        print(f"입력에 없는 원본의 shard {len(stale)}개 삭제: {', '.join(s['file'] for s in stale)}")
+    manifest["records"] = sum(s["records"] for s in manifest["shards"])
+    _prune_dedup_reports(shard_dir, manifest)
+    _save_shard_manifest(shard_dir, manifest)
+    by_source = {shard["source"]: shard for shard in manifest["shards"]}
+
+    todo = []
+    for path in paths:
+        stat = _source_stat(path)
+        prev = by_source.get(stat["source"])
+        if prev is None or any(prev[k] != stat[k] for k in ("source_bytes", "source_mtime_ns")):
+            todo.append((path, stat))
+    print(f"입력 파일 {len(paths)}개 중 {len(todo)}개 처리 (manifest에 있어 건너뜀 {len(paths) - len(todo)}개) → {shard_dir}")
+    if not todo:
+        return manifest
+    report_name = _new_dedup_report_name(shard_dir) if dedup is not None else None
+
+    if dedup is not None:
+        redo = {stat["source"] for _, stat in todo}
+        for shard in manifest["shards"]:
+            if shard["source"] in redo:
+                continue
+            with open(shard_dir / shard["file"], encoding="utf-8") as f:
+                for lineno, line in enumerate(f, 1):
+                    ref = json.loads(line).get("reference", "")
+                    dedup.add({"body_text": ref, "header_line": f"{shard['file']}:{lineno}"}, shard["source"])
+
+    parsed = _ordered_map(_parse_file_entries, [str(p) for p, _ in todo], workers, executor=ProcessPoolExecutor)
+    for (path, stat), entries in zip(todo, parsed):
+        if max_entries:
+            entries = entries[:max_entries]
+        prev = by_source.get(stat["source"])
+        if prev is not None:
+            name = prev["file"]
+        else:
+            name = f"shard-{manifest['next_shard']:05d}.jsonl"
+            manifest["next_shard"] += 1
+        removed_before = dedup.removed if dedup is not None else 0
+        kept = dedup.filter(entries, stat["source"]) if dedup is not None else entries
+        records = 0
+        tmp = shard_dir / (name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in _ordered_map(build, kept, concurrency):
+                if record is not None:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    records += 1
+        os.replace(tmp, shard_dir / name)
+
+        shard = {
+            "file": name,
+            **stat,
+            "entries": len(entries),
+            "duplicates": (dedup.removed if dedup is not None else 0) - removed_before,
+            "records": records,
+        }
+        if report_name is not None:
+            shard["dedup_report"] = report_name
+        if prev is not None:
+            manifest["shards"][manifest["shards"].index(prev)] = shard
+        else:
+            manifest["shards"].append(shard)
+        by_source[stat["source"]] = shard
+        manifest["records"] = sum(s["records"] for s in manifest["shards"])
+        if report_name is not None:
+            _save_dedup_report(dedup, shard_dir / report_name)
+        _save_shard_manifest(shard_dir, manifest)
+        print(f"  {path.name}: 엔트리 {len(entries)}개 → {records}개 저장 ({name})")
+    _prune_dedup_reports(shard_dir, manifest)
+    if report_name is not None:
+        _print_dedup_report(dedup.report(), shard_dir / report_name)
+    return manifest
+
+
+def _new_dedup_report_name(shard_dir: Path) -> str:
+    """이번 실행의 유사 중복 리포트 파일 이름 (dedup-YYYYmmdd-HHMMSS.json, 같은 초에 이미 있으면 -1, -2 ...)."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    name = f"dedup-{stamp}.json"
+    n = 0
+    while (shard_dir / name).exists():
+        n += 1
+        name = f"dedup-{stamp}-{n}.json"
+    return name
+
+
+def _prune_dedup_reports(shard_dir: Path, manifest: dict) -> None:
+    """manifest의 어떤 shard도 가리키지 않는 dedup-*.json 삭제."""
+    referenced = {shard.get("dedup_report") for shard in manifest["shards"]}
+    for path in shard_dir.glob("dedup-*.json"):
+        if path.name not in referenced:
+            path.unlink(missing_ok=True)
+
+
+def _save_dedup_report(dedup: NearDuplicateFilter, path: Path) -> dict:
+    report = dedup.report()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def _write_dedup_report(dedup: NearDuplicateFilter, path: Path) -> None:
+    _print_dedup_report(_save_dedup_report(dedup, path), path)
+
+
+def _print_dedup_report(report: dict, path: Path) -> None:
+    print(
+        f"유사 중복 제거: 엔트리 {report['entries']}개 중 {report['removed']}개 제거 "
+        f"(클러스터 {len(report['clusters'])}개) → {path}"
+    )
+    for cluster in report["clusters"][:5]:
+        print(f"  [{cluster['kept']['header_line']}] 외 {len(cluster['removed'])}개")
 
 
 def main():
@@ -223,12 +1008,12 @@ def main():
         "crawl_path",
         nargs="?",
         default="",
-        help="크롤링한 자기소개서 txt 파일 경로 (비우면 바탕화면 또는 data/ 자동 탐색)",
+        help="크롤링한 자기소개서 txt 파일 경로, 또는 여러 파일이 든 디렉터리/glob 패턴 (비우면 바탕화면 또는 data/ 자동 탐색)",
     )
     parser.add_argument(
         "--output", "-o",
-        default=str(DEFAULT_OUTPUT),
-        help="출력 JSONL 파일 경로",
+        default=None,
+        help=f"출력 JSONL 파일 경로 (기본 {DEFAULT_OUTPUT}). 여러 파일 입력이면 shard 디렉터리 (기본 {DEFAULT_SHARD_DIR})",
     )
     parser.add_argument(
         "--use-llm",
@@ -239,47 +1024,150 @@ def main():
         "--max-entries",
         type=int,
         default=0,
-        help="처리할 최대 엔트리 수 (0=전체)",
+        help="처리할 최대 엔트리 수 (0=전체, 여러 파일 입력이면 파일마다)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="--use-llm 시 동시에 보낼 OpenAI 요청 수 (실제 동시성은 공용 리미터 OPENAI_MAX_CONCURRENCY 이하)",
+    )
+    parser.add_argument(
+        "--cache-db",
+        default=str(DEFAULT_EXTRACT_CACHE),
+        help="--use-llm 추출 결과 SQLite 캐시 경로",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="--use-llm 추출 캐시를 읽지도 쓰지도 않음",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_DEDUP_THRESHOLD,
+        help="유사 중복으로 보고 제거할 본문 추정 Jaccard 유사도 (MinHash)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="유사 중복 제거를 하지 않음",
+    )
+    parser.add_argument(
+        "--keywords",
+        default="",
+        help='규칙 기반 추출 키워드 사전에 더할 JSON 파일 (예: {"certification": {"SQLP": "SQLP"}, "role": {"MD": "영업"}})',
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="진행 기록(<출력>.progress.json)이 있어도 무시하고 처음부터 처리",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="여러 파일 입력 시 파싱 프로세스 수",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="여러 파일 입력 시 shard manifest에 없거나 바뀐 파일만 처리 (없으면 shard 전체를 다시 만듦)",
     )
     args = parser.parse_args()
 
-    crawl_path = Path(args.crawl_path).expanduser() if args.crawl_path else _default_crawl_path()
-    if not crawl_path.exists():
-        print(f"오류: 파일을 찾을 수 없습니다. {crawl_path}", file=sys.stderr)
-        print("사용 예: python build_input_from_crawl.py \"C:\\Users\\SMHRD\\Desktop\\자기소개서크롤링100.txt\" -o data/examples.jsonl", file=sys.stderr)
-        sys.exit(1)
+    if args.keywords:
+        with open(args.keywords, encoding="utf-8") as f:
+            extend_keywords(json.load(f))
+
+    multi = bool(args.crawl_path) and _is_multi_source(args.crawl_path)
+    if multi:
+        paths = resolve_crawl_paths(args.crawl_path)
+        if not paths:
+            print(f"오류: 매칭되는 크롤링 파일이 없습니다. {args.crawl_path}", file=sys.stderr)
+            sys.exit(1)
+        out_path = Path(args.output or DEFAULT_SHARD_DIR)
+    else:
+        crawl_path = Path(args.crawl_path).expanduser() if args.crawl_path else _default_crawl_path()
+        if not crawl_path.exists():
+            print(f"오류: 파일을 찾을 수 없습니다. {crawl_path}", file=sys.stderr)
+            print("사용 예: python build_input_from_crawl.py \"C:\\Users\\SMHRD\\Desktop\\자기소개서크롤링100.txt\" -o data/examples.jsonl", file=sys.stderr)
+            sys.exit(1)
+        out_path = Path(args.output or DEFAULT_OUTPUT)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cache = ExtractionCache(Path(args.cache_db)) if args.use_llm and not args.no_cache else None
+    # 키가 없어도 캐시가 있으면 이미 추출한 엔트리는 LLM 결과를 씀 (나머지는 메타데이터)
+    use_llm = args.use_llm and (os.environ.get("OPENAI_API_KEY") or cache is not None)
+    if args.use_llm and not os.environ.get("OPENAI_API_KEY"):
+        if cache is not None:
+            print("경고: OPENAI_API_KEY 없음. 캐시에 있는 엔트리만 LLM 추출 결과를 쓰고 나머지는 메타데이터를 사용합니다.", file=sys.stderr)
+        else:
+            print("경고: OPENAI_API_KEY 없음. 메타데이터만 사용합니다.", file=sys.stderr)
+    client = make_openai_client() if use_llm else None
 
-    out_path = Path(args.output)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    dedup = None if args.no_dedup else NearDuplicateFilter(args.dedup_threshold)
+    build = functools.partial(build_record, client=client, use_llm=bool(use_llm), cache=cache)
+    concurrency = args.concurrency if use_llm else 1
 
+    if multi:
+        manifest = build_shards(
+            paths,
+            out_path,
+            build,
+            settings={"use_llm": bool(use_llm), "dedup_threshold": None if dedup is None else dedup.threshold},
+            dedup=dedup,
+            workers=args.workers,
+            concurrency=concurrency,
+            incremental=args.incremental,
+            max_entries=args.max_entries,
+        )
+        if cache is not None:
+            print(f"추출 캐시: {cache.hits}건 재사용, {cache.misses}건 새로 추출 시도")
+            cache.close()
+        print(f"완료: shard {len(manifest['shards'])}개, (input, reference) 쌍 {manifest['records']}개 → {out_path}")
+        return
+
+    fingerprint = _source_fingerprint(crawl_path, bool(use_llm), None if dedup is None else dedup.threshold)
+    progress = None if args.no_resume else _load_progress(out_path, fingerprint)
+    done = progress["entries_done"] if progress else 0
+    written = progress["written"] if progress else 0
+    output_bytes = progress["output_bytes"] if progress else 0
+    # 마지막 기록 이후에 쓰인 줄은 잘라 내고 그 엔트리부터 다시 처리
+    with open(out_path, "ab") as f:
+        f.truncate(output_bytes)
+    if progress:
+        print(f"이어서 처리: 엔트리 {done}개 완료({written}개 저장)된 지점부터")
+
+    # 파싱·변환·쓰기를 엔트리 단위로 흘려보내므로 큰 크롤링 파일도 전체를 메모리에 올리지 않음
     entries = parse_crawl_file(crawl_path)
     if args.max_entries:
-        entries = entries[: args.max_entries]
-    print(f"총 {len(entries)}개 엔트리 파싱됨. 출력: {out_path}")
+        entries = itertools.islice(entries, args.max_entries)
+    if dedup is not None:
+        # LLM 추출 전에 걸러야 호출도 아낌. 이어서 처리할 때도 결과가 같도록 건너뛸 엔트리까지 다시 색인
+        entries = dedup.filter(entries)
+    entries = itertools.islice(entries, done, None)
+    print(f"파싱 시작: {crawl_path} → {out_path}")
 
-    use_llm = args.use_llm and os.environ.get("OPENAI_API_KEY")
-    if args.use_llm and not os.environ.get("OPENAI_API_KEY"):
-        print("경고: OPENAI_API_KEY 없음. 메타데이터만 사용합니다.", file=sys.stderr)
-
-    written = 0
-    with open(out_path, "w", encoding="utf-8") as f:
-        for i, entry in enumerate(entries):
-            if use_llm:
-                inp = extract_input_with_openai(entry)
-                if inp is None:
-                    inp = build_input_from_metadata(entry)
-            else:
-                inp = build_input_from_metadata(entry)
-            ref = entry.get("body_text", "")
-            if len(ref) < 50:
-                continue
-            record = {"input": inp, "reference": ref}
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-            written += 1
-            if (i + 1) % 20 == 0:
-                print(f"  {i + 1}/{len(entries)} 처리됨")
+    with open(out_path, "ab") as f:
+        for record in _ordered_map(build, entries, concurrency):
+            done += 1
+            if record is not None:
+                f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                written += 1
+            if done % _PROGRESS_EVERY == 0:
+                f.flush()
+                _save_progress(out_path, fingerprint, done, written, f.tell())
+                print(f"  {done}개 처리됨")
+    _progress_path(out_path).unlink(missing_ok=True)
+    if cache is not None:
+        print(f"추출 캐시: {cache.hits}건 재사용, {cache.misses}건 새로 추출 시도")
+        cache.close()
+
+    if dedup is not None:
+        _write_dedup_report(dedup, _dedup_report_path(out_path))
 
-    print(f"완료: {written}개 (input, reference) 쌍 저장 → {out_path}")
+    print(f"완료: 엔트리 {done}개 중 {written}개 (input, reference) 쌍 저장 → {out_path}")
 
 
 if __name__ == "__main__":
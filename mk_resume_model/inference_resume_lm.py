@@ -3,8 +3,16 @@
 파인튜닝된 resume_lm 체크포인트로 자기소개서 생성.
 
 - train_resume_model.py와 동일한 프롬프트 형식 사용 (PROMPT_PREFIX + [입력] + 직무/역량/학력/경험/강점 + [자기소개서]).
-- load_model: 체크포인트에서 토크나이저·모델 로드.
+- load_model: 체크포인트에서 토크나이저·모델 로드. LoRA 어댑터 디렉터리(adapter_config.json)면 base + 어댑터로 로드.
+  train_resume_model.py --export_dir로 만든 서빙 체크포인트(serving_manifest.json)면 safetensors를 memory-map으로 복사 없이 로드.
+- attach_adapters: 이미 로드한 base에 직무별 LoRA 어댑터 여러 개를 이름 붙여 올림 (base 가중치는 메모리에 한 벌).
 - generate: input_dict로 프롬프트 만들고 [자기소개서] 뒤부터 EOS 전까지 생성해 본문만 반환.
+- generate_batch: 여러 input_dict를 left padding으로 묶어 한 번의 model.generate로 생성 (배치 API용).
+- assistant_model: train_resume_model.py --draft 로 만든 소형 드래프트 모델을 넘기면 assisted(speculative) decoding.
+  드래프트가 여러 토큰을 제안하고 본 모델이 한 번에 검증하므로 CPU에서 토큰당 메모리 대역폭 병목이 줄어듦.
+
+벤치마크:
+  python inference_resume_lm.py --checkpoint checkpoints/resume_lm --draft_checkpoint checkpoints/resume_lm_draft
 """
 from __future__ import annotations
 
@@ -15,6 +23,8 @@ PROMPT_PREFIX = "직무·역량·배경에 따른 자기소개서 초안을 작
 INPUT_PREFIX = "[입력]\n"
 OUTPUT_PREFIX = "\n[자기소개서]\n"
 EOS = "<|endoftext|>"
+# train_resume_model.export_for_serving이 쓰는 서빙 체크포인트 표시 파일
+SERVING_MANIFEST = "serving_manifest.json"
 
 
 def _serialize_input(inp: dict) -> str:
@@ -32,8 +42,36 @@ def _serialize_input(inp: dict) -> str:
     return "\n".join(parts)
 
 
-def load_model(checkpoint_path: str | Path, *, use_cpu: bool = False):
-    """체크포인트 디렉터리에서 토크나이저·Causal LM 로드. pad_token 없으면 eos_token으로 설정. use_cpu=True면 GPU 미사용."""
+def _build_prompt(inp: dict) -> str:
+    """학습 시와 동일한 프롬프트: PROMPT_PREFIX + [입력] + 직렬화 입력 + [자기소개서]."""
+    return (
+        PROMPT_PREFIX
+        + INPUT_PREFIX
+        + _serialize_input(inp)
+        + OUTPUT_PREFIX
+    )
+
+
+def _extract_completion(full: str) -> str:
+    """디코딩된 전체 문자열에서 [자기소개서] 뒤 ~ EOS 전까지만 잘라 반환."""
+    if OUTPUT_PREFIX in full:
+        text = full.split(OUTPUT_PREFIX, 1)[1]
+    else:
+        text = full
+    if EOS in text:
+        text = text.split(EOS)[0]
+    return text.strip()
+
+
+def load_model(checkpoint_path: str | Path, *, use_cpu: bool = False, base_model: str | None = None):
+    """
+    체크포인트 디렉터리에서 토크나이저·Causal LM 로드. pad_token 없으면 eos_token으로 설정. use_cpu=True면 GPU 미사용.
+    train_resume_model.py --lora 결과(adapter_config.json)면 base 모델(base_model, 없으면 어댑터 설정의 base)을 로드하고
+    어댑터를 "default" 이름으로 올린 PeftModel 반환. --lora_merge_dir로 병합한 체크포인트는 일반 모델과 같음.
+    서빙 체크포인트(serving_manifest.json)는 저장된 dtype 그대로 로드해 파라미터가 safetensors 파일의 mmap을 그대로 가리킴
+    (cold start 때 가중치 복사 없음, 같은 파일을 여는 워커 프로세스끼리 페이지 캐시 공유). CPU 서빙에서 use_cpu=True일 때만 유지되고,
+    GPU로 옮기면 그때 복사됨.
+    """
     from transformers import AutoModelForCausalLM, AutoTokenizer
 
     path = Path(checkpoint_path)
@@ -44,7 +82,30 @@ def load_model(checkpoint_path: str | Path, *, use_cpu: bool = False):
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
 
-    model = AutoModelForCausalLM.from_pretrained(path)
+    if (path / "adapter_config.json").exists():
+        import json
+
+        from peft import PeftModel
+
+        with open(path / "adapter_config.json", encoding="utf-8") as f:
+            base = base_model or json.load(f)["base_model_name_or_path"]
+        model = PeftModel.from_pretrained(AutoModelForCausalLM.from_pretrained(base), path)
+    elif (path / SERVING_MANIFEST).exists():
+        import json
+
+        import torch
+
+        with open(path / SERVING_MANIFEST, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 파일과 같은 dtype으로 로드해야 변환 복사 없이 mmap 텐서를 그대로 씀
+        model = AutoModelForCausalLM.from_pretrained(
+            path,
+            dtype=getattr(torch, manifest["dtype"]),
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+    else:
+        model = AutoModelForCausalLM.from_pretrained(path)
     if use_cpu:
         model = model.to("cpu")
     else:
@@ -64,19 +125,18 @@ def generate(
     temperature: float = 0.8,
     top_p: float = 0.95,
     pad_token_id: int | None = None,
+    assistant_model=None,
+    max_time: float | None = None,
 ) -> str:
     """
     input_dict(roles, competencies, background)로 프롬프트 문자열을 만든 뒤 모델에 넣고,
     생성 결과에서 [자기소개서] 뒤부터 EOS 전까지 잘라서 본문만 반환.
+    assistant_model이 있으면 assisted decoding (같은 토크나이저로 학습된 드래프트 모델이어야 함).
+    max_time(초)을 주면 그 시간이 지나면 생성을 멈추고 그때까지의 본문을 반환 (요청 데드라인용).
     """
     import torch
 
-    prompt_part = (
-        PROMPT_PREFIX
-        + INPUT_PREFIX
-        + _serialize_input(input_dict)
-        + OUTPUT_PREFIX
-    )
+    prompt_part = _build_prompt(input_dict)
     if pad_token_id is None:
         pad_token_id = tokenizer.pad_token_id or tokenizer.eos_token_id
 
@@ -89,6 +149,9 @@ def generate(
     device = next(model.parameters()).device
     inputs = {k: v.to(device) for k, v in inputs.items()}
 
+    extra = {"assistant_model": assistant_model} if assistant_model is not None else {}
+    if max_time is not None:
+        extra["max_time"] = max_time
     with torch.no_grad():
         out = model.generate(
             **inputs,
@@ -98,14 +161,216 @@ def generate(
             top_p=top_p,
             pad_token_id=pad_token_id,
             eos_token_id=tokenizer.eos_token_id,
+            **extra,
         )
 
     full = tokenizer.decode(out[0], skip_special_tokens=False)
     # [자기소개서] 뒤만 추출, EOS 전까지
-    if OUTPUT_PREFIX in full:
-        text = full.split(OUTPUT_PREFIX, 1)[1]
-    else:
-        text = full
-    if EOS in text:
-        text = text.split(EOS)[0]
-    return text.strip()
+    return _extract_completion(full)
+
+
+def generate_batch(
+    input_dicts: list[dict],
+    tokenizer,
+    model,
+    *,
+    batch_size: int = 8,
+    max_new_tokens: int = 512,
+    do_sample: bool = True,
+    temperature: float = 0.8,
+    top_p: float = 0.95,
+    max_time: float | None = None,
+) -> list[str]:
+    """
+    여러 input_dict를 batch_size개씩 묶어 생성. 반환 순서는 입력 순서와 같음.
+    decoder-only 모델은 프롬프트 끝에서 이어 써야 하므로 left padding으로 토큰화하고,
+    생성 부분(프롬프트 길이 이후)만 디코딩해 EOS 전까지 잘라 반환.
+    assisted decoding은 batch size 1만 지원하므로 여기서는 사용하지 않음.
+    max_time(초)은 전체 배치 기준. 시간이 다 되면 남은 묶음은 생성하지 않고 빈 문자열.
+    """
+    import time
+
+    import torch
+
+    if not input_dicts:
+        return []
+    pad_token_id = tokenizer.pad_token_id or tokenizer.eos_token_id
+    device = next(model.parameters()).device
+    padding_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"
+    drafts: list[str] = []
+    deadline = None if max_time is None else time.monotonic() + max_time
+    try:
+        for start in range(0, len(input_dicts), max(1, batch_size)):
+            extra = {}
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    drafts.extend([""] * len(input_dicts[start : start + batch_size]))
+                    continue
+                extra["max_time"] = remaining
+            prompts = [_build_prompt(x) for x in input_dicts[start : start + batch_size]]
+            inputs = tokenizer(
+                prompts,
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=1024,
+            )
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            with torch.no_grad():
+                out = model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=do_sample,
+                    temperature=temperature,
+                    top_p=top_p,
+                    pad_token_id=pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id,
+                    **extra,
+                )
+            prompt_len = inputs["input_ids"].shape[1]
+            for row in out:
+                completion = tokenizer.decode(row[prompt_len:], skip_special_tokens=False)
+                drafts.append(_extract_completion(OUTPUT_PREFIX + completion))
+    finally:
+        tokenizer.padding_side = padding_side
+    return drafts
+
+
+
+def attach_adapters(model, adapters: dict[str, str | Path]):
+    """
+    base 모델(또는 이미 어댑터가 올라간 PeftModel)에 LoRA 어댑터들을 이름별로 추가해 PeftModel 반환.
+    어댑터끼리 base 가중치를 공유하고, 생성 전에 model.set_adapter(name)으로 고름 (동시에 여러 어댑터로 생성 불가).
+    """
+    from peft import PeftModel
+
+    device = next(model.parameters()).device
+    for name, adapter_path in adapters.items():
+        if isinstance(model, PeftModel):
+            model.load_adapter(str(adapter_path), adapter_name=name)
+        else:
+            model = PeftModel.from_pretrained(model, str(adapter_path), adapter_name=name)
+    return model.to(device)
+
+
+def load_draft_model(draft_path: str | Path, model, *, use_cpu: bool = False):
+    """
+    assisted decoding용 드래프트 모델 로드. 본 모델과 임베딩 행 수(vocab)가 다르면 검증이 불가능하므로 ValueError.
+    len(tokenizer)는 임베딩을 패딩해 늘린 모델과 다를 수 있어 임베딩 크기끼리 비교.
+    """
+    _, draft = load_model(draft_path, use_cpu=use_cpu)
+    draft_vocab = draft.get_input_embeddings().num_embeddings
+    main_vocab = model.get_input_embeddings().num_embeddings
+    if draft_vocab != main_vocab:
+        raise ValueError(f"드래프트 모델 vocab({draft_vocab})이 본 모델({main_vocab})과 다릅니다: {draft_path}")
+    return draft
+
+
+def benchmark_assisted(
+    tokenizer,
+    model,
+    draft_model,
+    input_dicts: list[dict],
+    *,
+    runs: int = 3,
+    max_new_tokens: int = 256,
+) -> dict:
+    """
+    같은 입력으로 일반 디코딩과 assisted 디코딩의 tokens/sec를 측정.
+    두 경우 모두 greedy(do_sample=False)로 돌려 생성 길이가 비슷하게 나오도록 함. 첫 1회는 워밍업으로 제외.
+    """
+    import time
+
+    import torch
+
+    device = next(model.parameters()).device
+
+    def _run(assistant) -> tuple[int, float]:
+        tokens, seconds = 0, 0.0
+        for i in range(runs + 1):
+            for inp in input_dicts:
+                enc = tokenizer(_build_prompt(inp), return_tensors="pt", truncation=True, max_length=1024)
+                enc = {k: v.to(device) for k, v in enc.items()}
+                extra = {"assistant_model": assistant} if assistant is not None else {}
+                start = time.perf_counter()
+                with torch.no_grad():
+                    out = model.generate(
+                        **enc,
+                        max_new_tokens=max_new_tokens,
+                        do_sample=False,
+                        pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id,
+                        eos_token_id=tokenizer.eos_token_id,
+                        **extra,
+                    )
+                elapsed = time.perf_counter() - start
+                if i == 0:
+                    continue
+                tokens += out.shape[1] - enc["input_ids"].shape[1]
+                seconds += elapsed
+        return tokens, seconds
+
+    base_tokens, base_seconds = _run(None)
+    assisted_tokens, assisted_seconds = _run(draft_model)
+    base_tps = base_tokens / base_seconds if base_seconds else 0.0
+    assisted_tps = assisted_tokens / assisted_seconds if assisted_seconds else 0.0
+    return {
+        "baseline_tokens_per_sec": round(base_tps, 2),
+        "assisted_tokens_per_sec": round(assisted_tps, 2),
+        "speedup": round(assisted_tps / base_tps, 3) if base_tps else None,
+        "baseline_tokens": base_tokens,
+        "assisted_tokens": assisted_tokens,
+        "runs": runs,
+        "max_new_tokens": max_new_tokens,
+    }
+
+
+_BENCHMARK_INPUTS = [
+    {
+        "roles": ["데이터 분석가"],
+        "competencies": ["데이터 분석", "문제해결", "커뮤니케이션"],
+        "background": {
+            "education": "컴퓨터공학 전공",
+            "experiences": ["데이터 분석 인턴 6개월", "동아리 회장 1년"],
+            "strengths": ["문제해결", "커뮤니케이션"],
+        },
+    },
+    {
+        "roles": ["마케팅"],
+        "competencies": ["마케팅", "기획", "협업"],
+        "background": {
+            "education": "경영학 전공",
+            "experiences": ["공모전 수상", "SNS 마케팅 인턴"],
+            "strengths": ["기획력"],
+        },
+    },
+]
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="resume_lm 일반 디코딩 vs assisted 디코딩 tokens/sec 벤치마크")
+    parser.add_argument("--checkpoint", type=str, default=str(Path(__file__).resolve().parent / "checkpoints" / "resume_lm"))
+    parser.add_argument(
+        "--draft_checkpoint",
+        type=str,
+        default=str(Path(__file__).resolve().parent / "checkpoints" / "resume_lm_draft"),
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max_new_tokens", type=int, default=256)
+    parser.add_argument("--cpu", action="store_true", help="GPU가 있어도 CPU로 측정")
+    args = parser.parse_args()
+
+    tokenizer, model = load_model(args.checkpoint, use_cpu=args.cpu)
+    draft = load_draft_model(args.draft_checkpoint, model, use_cpu=args.cpu)
+    report = benchmark_assisted(
+        tokenizer, model, draft, _BENCHMARK_INPUTS, runs=args.runs, max_new_tokens=args.max_new_tokens
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 자기소개서 생성 결과 모델.
 
 - API/서비스 레이어에서 자기소개서 생성 완료 후 클라이언트에 돌려줄 때 사용하는 데이터 구조.
-- draft: 실제 자기소개서 본문, reasoning: 왜 이렇게 썼는지 설명(선택), word_count: 글자 수.
+- draft: 실제 자기소개서 본문, reasoning: 왜 이렇게 썼는지 설명(선택), word_count: 글자 수,
+  cached: 응답 캐시 적중 여부.
 """
 
 from dataclasses import dataclass
@@ -20,3 +21,4 @@ class SelfIntroResponse:
     reasoning: Optional[str] = None  # 추론 과정 (디버깅/검토용, 선택적. 학습된 LM 사용 시 "(학습된 모델로 생성)" 등)
     word_count: int = 0  # 생성된 글자 수 (공백·줄바꿈 제외, 한글 기준)
     scoring: Optional[dict] = None  # 적합도 스코어링 정보: {type_similarity, aptitude_fit, competency_reflection, average}
+    cached: bool = False  # 서비스 응답 캐시에서 반환된 경우 True
@@ -1,8 +1,192 @@
 import os
 import json
+import random
+import threading
+import time
+from contextlib import nullcontext
 from typing import List, Optional
 from pydantic import BaseModel
 
+
+class OpenAIRateLimiter:
+    """
+    프로세스 내 모든 OpenAI 호출이 공유하는 레이트 리미터.
+    - 분당 요청 수(rpm)·분당 토큰 수(tpm)를 각각 토큰 버킷으로 제한 (1분 동안 균등하게 다시 채워짐)
+    - 동시 요청 수는 AIMD로 조절: 성공마다 +1/limit(한 라운드에 약 +1), 429를 받으면 절반으로 줄임
+    - 429 응답의 retry-after(-ms) 헤더가 있으면 그 시간 동안 새 요청을 보내지 않음
+    - 연결 끊김·타임아웃·5xx는 그 요청만 지수 백오프(지터 포함) 후 재시도 (다른 요청은 멈추지 않음)
+    OpenAI 클라이언트는 max_retries=0으로 만들고 재시도는 call()에 맡겨야 429가 여기서 관측됨.
+    """
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int, min_concurrency: int = 1):
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.concurrency_limit = float(self.max_concurrency)
+        self._request_tokens = self.rpm
+        self._token_tokens = self.tpm
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_tokens = min(self.rpm, self._request_tokens + elapsed * self.rpm / 60)
+        self._token_tokens = min(self.tpm, self._token_tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, est_tokens: int = 1000, timeout: float | None = None) -> None:
+        """요청 1건을 보낼 수 있을 때까지 대기. timeout 초 안에 못 받으면 TimeoutError."""
+        need = min(float(est_tokens), self.tpm)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                waits = []
+                if now < self._paused_until:
+                    waits.append(self._paused_until - now)
+                if self._in_flight >= int(self.concurrency_limit):
+                    waits.append(1.0)  # release()의 notify로 먼저 깨어남
+                if self._request_tokens < 1:
+                    waits.append((1 - self._request_tokens) * 60 / self.rpm)
+                if self._token_tokens < need:
+                    waits.append((need - self._token_tokens) * 60 / self.tpm)
+                if not waits:
+                    self._request_tokens -= 1
+                    self._token_tokens -= need
+                    self._in_flight += 1
+                    return
+                wait = max(waits)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise TimeoutError("OpenAI 레이트 리미터 대기 시간 초과")
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def release(
+        self,
+        est_tokens: int = 1000,
+        *,
+        actual_tokens: int | None = None,
+        rate_limited: bool = False,
+        retry_after: float | None = None,
+    ) -> None:
+        """acquire()한 요청 1건 종료. 실제 토큰 수로 버킷을 보정하고, 결과에 따라 동시성 한도를 조절."""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if actual_tokens is not None:
+                self._token_tokens -= actual_tokens - min(float(est_tokens), self.tpm)
+            if rate_limited:
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+                pause = retry_after if retry_after is not None else 1.0
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            else:
+                self.concurrency_limit = min(
+                    float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit
+                )
+            self._cond.notify_all()
+
+    def call(self, fn, *, est_tokens: int = 1000, max_retries: int = 3, timeout: float | None = None):
+        """
+        fn()을 리미터 아래에서 실행. 429면 retry-after(없으면 지수 백오프)만큼 쉬고,
+        연결 끊김·타임아웃·5xx면 지터를 넣은 지수 백오프만큼 쉬고 최대 max_retries번 재시도.
+        그 밖의 예외와 마지막 실패는 그대로 전파. 결과에 usage가 있으면 실제 토큰 수로 보정.
+        timeout(초)은 대기·재시도를 모두 포함한 전체 한도. 쉬어야 할 시간이 남은 시간보다 길면 재시도하지 않음.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for attempt in range(max_retries + 1):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            self.acquire(est_tokens, timeout=remaining)
+            try:
+                result = fn()
+            except Exception as e:
+                if _is_rate_limit_error(e):
+                    retry_after = _retry_after_seconds(e)
+                    if retry_after is None:
+                        retry_after = min(30.0, 2.0 ** attempt)
+                    self.release(est_tokens, rate_limited=True, retry_after=retry_after)
+                    out_of_time = deadline is not None and time.monotonic() + retry_after >= deadline
+                    if attempt < max_retries and not out_of_time:
+                        continue
+                elif _is_transient_error(e):
+                    self.release(est_tokens)
+                    backoff = min(30.0, 2.0 ** attempt) * random.uniform(0.5, 1.0)
+                    out_of_time = deadline is not None and time.monotonic() + backoff >= deadline
+                    if attempt < max_retries and not out_of_time:
+                        time.sleep(backoff)
+                        continue
+                else:
+                    self.release(est_tokens)
+                raise
+            self.release(est_tokens, actual_tokens=_usage_total_tokens(result))
+            return result
+
+
+def _is_rate_limit_error(e: Exception) -> bool:
+    """openai.RateLimitError(langchain 경유 포함) 또는 status_code 429."""
+    return getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError"
+
+
+def _is_transient_error(e: Exception) -> bool:
+    """연결 끊김·타임아웃·5xx처럼 잠시 뒤 다시 보내면 성공할 수 있는 오류인지 (429는 _is_rate_limit_error가 따로 처리)."""
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status >= 500
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError", "InternalServerError")
+
+
+def _retry_after_seconds(e: Exception) -> float | None:
+    """429 응답 헤더의 retry-after-ms / retry-after(초) 값. 없거나 파싱 실패 시 None."""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _usage_total_tokens(result) -> int | None:
+    """OpenAI 응답(usage.total_tokens) 또는 langchain AIMessage(usage_metadata)의 총 토큰 수."""
+    usage = getattr(result, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None) is not None:
+        return int(usage.total_tokens)
+    meta = getattr(result, "usage_metadata", None)
+    if isinstance(meta, dict) and meta.get("total_tokens") is not None:
+        return int(meta["total_tokens"])
+    return None
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = 0) -> int:
+    """요청 토큰 수 대략 추정 (한국어 위주라 글자 수/2) + 예상 출력 토큰. 버킷 선차감용."""
+    return sum(len(t or "") for t in texts) // 2 + completion_tokens
+
+
+_OPENAI_LIMITER: OpenAIRateLimiter | None = None
+_OPENAI_LIMITER_LOCK = threading.Lock()
+
+
+def get_openai_limiter() -> OpenAIRateLimiter:
+    """
+    프로세스 공용 리미터. OPENAI_RPM(기본 500), OPENAI_TPM(기본 200000), OPENAI_MAX_CONCURRENCY(기본 8)로 설정.
+    자기소개서 서비스, build_input_from_crawl, rag-cover-letter, rag-roadmap이 모두 이걸 사용.
+    """
+    global _OPENAI_LIMITER
+    with _OPENAI_LIMITER_LOCK:
+        if _OPENAI_LIMITER is None:
+            _OPENAI_LIMITER = OpenAIRateLimiter(
+                rpm=float(os.environ.get("OPENAI_RPM", "500")),
+                tpm=float(os.environ.get("OPENAI_TPM", "200000")),
+                max_concurrency=int(os.environ.get("OPENAI_MAX_CONCURRENCY", "8")),
+            )
+        return _OPENAI_LIMITER
+
 class SelfIntroInput(BaseModel):
     roles: List[str]
     competencies: List[str]
@@ -18,22 +202,82 @@ class SelfIntroInput(BaseModel):
 class SelfIntroVersion(BaseModel):
     title: str
     draft: str
-    scoring: dict  # {type_similarity: int, aptitude_fit: int, competency_reflection: int, average: float}
+    # {type_similarity: int, aptitude_fit: int, competency_reflection: int, average: float}
+    # OpenAI에는 요청하지 않고 서비스에서 model_validation.score_draft로 로컬 계산해 채움
+    scoring: Optional[dict] = None
 
 class SelfIntroOutput(BaseModel):
     reasoning: str
     versions: List[SelfIntroVersion]
 
-def generate_with_openai(input_data: SelfIntroInput, api_key: str, model: str = "gpt-4o-mini") -> SelfIntroOutput:
+def _find_too_short(versions: list, min_len: int) -> list[int]:
+    """versions 중 draft가 min_len 미만인 버전의 인덱스 목록."""
+    return [i for i, v in enumerate(versions) if len(str(v.get("draft") or "")) < min_len]
+
+
+def _build_expand_instruction(short_versions: list, min_len: int, max_len: int) -> str:
+    """분량 미달 버전만 확장하도록 하는 추가 지시문. 기존 초안을 넘겨 처음부터 다시 쓰지 않게 함."""
+    blocks = []
+    for v in short_versions:
+        title = str(v.get("title") or "").strip() or "(제목 없음)"
+        blocks.append(f"[{title}]\n\"\"\"\n{str(v.get('draft') or '').strip()}\n\"\"\"")
+    titles = ", ".join(str(v.get("title") or "").strip() or "(제목 없음)" for v in short_versions)
+    return (
+        "추가 지시: 아래 버전은 분량이 부족합니다. 다른 버전은 다시 작성하지 말고, 아래 버전만 확장하세요.\n"
+        f"각 초안의 흐름은 유지하되 {min_len}자 이상 {max_len}자 이하가 되도록 구체 사례(상황-행동-결과), "
+        "수치/성과(컨텍스트에 있는 범위), 학습/성장 내용을 추가하세요. "
+        "단, 사실은 상담 원문/RAG에 있는 내용만 사용하고 없는 사실은 만들지 마세요.\n"
+        f"분량 부족 버전: {titles}\n\n"
+        + "\n\n".join(blocks)
+        + "\n\n출력 형식: 위 버전만 담아 아래 JSON만 출력 (reasoning 불필요, title은 그대로 유지).\n"
+        '{ "versions": [ { "title": "...", "draft": "..." } ] }'
+    )
+
+
+def _merge_expanded(versions: list, too_short: list[int], expanded: list) -> list:
+    """
+    확장 결과를 원래 versions에 병합. title이 같은 버전끼리 매칭하고, 못 찾으면 순서대로 대응.
+    확장본이 기존보다 길 때만 교체하며, 통과한 버전은 draft를 그대로 둠.
+    """
+    merged = list(versions)
+    by_title = {str(e.get("title") or "").strip(): e for e in expanded if isinstance(e, dict)}
+    for order, idx in enumerate(too_short):
+        old = merged[idx]
+        title = str(old.get("title") or "").strip()
+        new = by_title.get(title)
+        if new is None and order < len(expanded) and isinstance(expanded[order], dict):
+            new = expanded[order]
+        if new is None:
+            continue
+        new_draft = str(new.get("draft") or "")
+        if len(new_draft) <= len(str(old.get("draft") or "")):
+            continue
+        merged[idx] = {**old, "draft": new_draft}
+    return merged
+
+
+def generate_with_openai(
+    input_data: SelfIntroInput,
+    api_key: str,
+    model: str = "gpt-4o-mini",
+    *,
+    timings=None,
+    deadline: float | None = None,
+) -> SelfIntroOutput:
     """
     OpenAI Chat Completion API를 호출하여 3가지 버전의 자기소개서를 생성합니다.
+    timings(service.StageTimings 등 stage()/count()를 가진 객체)를 넘기면
+    첫 호출은 openai, 분량 보충 재요청은 openai_retry 단계로 시간을 기록하고 usage 토큰 수도 누적합니다.
+    deadline(time.monotonic() 기준 절대 시각)을 주면 호출마다 남은 시간을 timeout으로 걸고,
+    분량 보충 재요청은 첫 호출만큼의 시간이 남아 있을 때만 보냅니다. 시간이 없으면 TimeoutError.
     """
     try:
         from openai import OpenAI
     except ImportError:
         raise ImportError("openai 패키지가 설치되어 있지 않습니다. 'pip install openai'를 실행하세요.")
 
-    client = OpenAI(api_key=api_key)
+    # 재시도는 공용 레이트 리미터가 담당 (429를 관측해 동시성을 줄이고 retry-after를 지키도록)
+    client = OpenAI(api_key=api_key, max_retries=0)
 
     # 배경 정보 정리
     bg = input_data.background
@@ -74,23 +318,15 @@ def generate_with_openai(input_data: SelfIntroInput, api_key: str, model: str =
 - **경험 중심**: 상담/프로필 경험을 STAR로 서술.
 - **가치관 중심**: 상담에서 드러난 가치관을 에피소드와 연결.
 
-**[적합도 스코어링 - 반드시 본문을 평가해 산출]**
-- 각 버전의 **실제 작성된 draft 본문**을 읽고, 아래 기준으로 **내담자·직무마다 다르게** 점수를 부여하시오. 모든 버전에 동일한 점수(예: 85)를 주지 말 것.
-- type_similarity(자소서 유형 유사도): 해당 버전 테마(역량/경험/가치관)가 본문에 얼마나 충실히 반영되었는지 0~100.
-- aptitude_fit(적성·직무 적합도): 내담자 성향·경험이 추천 직무와 얼마나 맞는지 0~100.
-- competency_reflection(직무역량 반영도): 핵심 역량이 본문에서 구체적으로 증명되었는지 0~100.
-- average: 위 세 항목의 산술 평균(소수 가능). 버전마다·내담자마다 달라야 함.
-- 점수는 본문 품질·RAG 반영도에 따라 70~98 범위에서 차이 나게 산출하시오.
-
 출력 형식: 아래 JSON만 출력.
-{
-  "reasoning": "RAG 반영 방식 및 각 버전별 스코어 산출 근거(왜 그 점수인지) 요약",
+{{
+  "reasoning": "RAG 반영 방식 및 버전별 구성 요약",
   "versions": [
-    { "title": "역량 중심", "draft": "본문({min_len}~{max_len}자)", "scoring": { "type_similarity": 92, "aptitude_fit": 88, "competency_reflection": 90, "average": 90.0 } },
-    { "title": "경험 중심", "draft": "본문({min_len}~{max_len}자)", "scoring": { "type_similarity": 88, "aptitude_fit": 91, "competency_reflection": 85, "average": 88.0 } },
-    { "title": "가치관 중심", "draft": "본문({min_len}~{max_len}자)", "scoring": { "type_similarity": 90, "aptitude_fit": 86, "competency_reflection": 88, "average": 88.0 } }
+    {{ "title": "역량 중심", "draft": "본문({min_len}~{max_len}자)" }},
+    {{ "title": "경험 중심", "draft": "본문({min_len}~{max_len}자)" }},
+    {{ "title": "가치관 중심", "draft": "본문({min_len}~{max_len}자)" }}
   ]
-}
+}}
 """
 
     user_content = f"""
@@ -133,39 +369,53 @@ def generate_with_openai(input_data: SelfIntroInput, api_key: str, model: str =
 - 목표 분량: 버전당 공백 포함 **{min_len}자 이상 {max_len}자 이하**. 미만/초과 금지.
 """
 
-    def _call(extra_instruction: str = "") -> dict:
+    def _remaining() -> float | None:
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("요청 데드라인 초과로 OpenAI 호출 생략")
+        return remaining
+
+    def _call(extra_instruction: str = "", stage: str = "openai") -> dict:
         uc = user_content
         if extra_instruction.strip():
             uc += "\n\n" + extra_instruction.strip() + "\n"
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": uc},
-            ],
-            temperature=0.3,
-            response_format={"type": "json_object"},
-        )
+        with timings.stage(stage) if timings is not None else nullcontext():
+            response = get_openai_limiter().call(
+                lambda: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": uc},
+                    ],
+                    temperature=0.3,
+                    response_format={"type": "json_object"},
+                    timeout=_remaining(),
+                ),
+                est_tokens=estimate_tokens(system_prompt, uc, completion_tokens=3 * max_len),
+                timeout=_remaining(),
+            )
+        usage = getattr(response, "usage", None)
+        if timings is not None and usage is not None:
+            timings.count("openai_prompt_tokens", usage.prompt_tokens)
+            timings.count("openai_completion_tokens", usage.completion_tokens)
         return json.loads(response.choices[0].message.content)
 
+    started = time.monotonic()
     result_json = _call()
+    first_call_seconds = time.monotonic() - started
 
-    # 분량 미달 버전이 있으면 1회 재요청(확장)
+    # 분량 미달 버전이 있으면 해당 버전만 1회 재요청(확장) 후 result_json에 병합 (데드라인 안에 끝날 것 같을 때만)
     try:
         versions = result_json.get("versions") or []
-        too_short: list[str] = []
-        for v in versions:
-            title = str(v.get("title") or "").strip() or "(제목 없음)"
-            draft = str(v.get("draft") or "")
-            if len(draft) < min_len:
-                too_short.append(title)
-        if too_short:
-            result_json = _call(
-                "추가 지시: 아래 버전은 분량이 부족합니다. "
-                f"{min_len}자 이상이 되도록 구체 사례(상황-행동-결과), 수치/성과(컨텍스트에 있는 범위), 학습/성장 내용을 추가해 확장하세요. "
-                "단, 사실은 상담 원문/RAG에 있는 내용만 사용하고 없는 사실은 만들지 마세요. "
-                "분량 부족 버전: " + ", ".join(too_short)
+        too_short = _find_too_short(versions, min_len)
+        if too_short and (deadline is None or deadline - time.monotonic() > first_call_seconds):
+            expanded = _call(
+                _build_expand_instruction([versions[i] for i in too_short], min_len, max_len),
+                stage="openai_retry",
             )
+            result_json["versions"] = _merge_expanded(versions, too_short, expanded.get("versions") or [])
     except Exception:
         pass
 
@@ -7,11 +7,25 @@
         (3) OpenAI가 있으면 위 1차 초안들을 참고해 재작성(풍성화) 후 반환
         (4) OpenAI를 못 쓰면 LM/템플릿 중 가능한 결과로 폴백
 - create_self_introduction_simple: 인자만 넣어서 빠르게 호출할 때 사용.
+- create_self_introductions_batch: 여러 요청을 한 번에. 템플릿은 일괄, LM은 배치 generate, OpenAI는 동시 호출.
+- 응답 캐시: 정규화한 요청 + 모델명 해시를 키로 LRU 메모리(+선택 SQLite) 캐시. 같은 요청 재호출 시 OpenAI/LM 생략.
+- 스코어링: 응답 scoring은 model_validation.score_draft로 로컬 계산 (OpenAI/LM/템플릿 초안 공통, 결정적·무료).
+- 계측: 요청마다 StageTimings에 단계별 소요 시간·토큰 수를 기록하고, 전역 히스토그램에 누적 (render_metrics).
+- 서킷 브레이커: OpenAI가 연속 실패하거나 SLO보다 느리면 잠시 OpenAI를 건너뛰고 바로 LM/템플릿으로 응답.
+- 데드라인: deadline_ms를 주면 남은 시간을 LM(max_time)·OpenAI(호출 timeout)에 나눠 주고, 시간이 부족한 단계는 건너뜀.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, replace
 from pathlib import Path
 
 from models.counseling import AIAnalysisResult, CounselingContent, ExtractedBackground, SelfIntroRequest
@@ -19,12 +33,357 @@ from models.output import SelfIntroResponse
 from adapter import to_self_intro_input
 from self_intro_generator import SelfIntroInput as DataclassSelfIntroInput, generate_self_introduction
 from openai_generator import generate_with_openai, SelfIntroInput as OpenAISelfIntroInput
+from model_validation import _CHECKPOINT_HASH_PATTERNS, score_draft
 
 _SERVICE_DIR = Path(__file__).resolve().parent
 _DEFAULT_CHECKPOINT = _SERVICE_DIR / "checkpoints" / "resume_lm"
+_DEFAULT_SERVING_CHECKPOINT = _SERVICE_DIR / "checkpoints" / "resume_lm_serving"
+_DEFAULT_DRAFT_CHECKPOINT = _SERVICE_DIR / "checkpoints" / "resume_lm_draft"
 # LM 로드 후 재사용 (전역 캐시)
 _RESUME_LM_MODEL = None
 _RESUME_LM_TOKENIZER = None
+# assisted decoding용 드래프트 모델 (없으면 None, 로드 시도는 1회만)
+_RESUME_LM_DRAFT = None
+_RESUME_LM_DRAFT_TRIED = False
+# 직무별 LoRA 어댑터: RESUME_LM_ADAPTERS='{"데이터": "checkpoints/lora_data", "마케팅": "checkpoints/lora_mkt"}'
+# 키가 요청 roles 중 하나에 포함되면 그 어댑터로 생성. base 한 벌을 공유하므로 어댑터 전환·생성은 락 안에서.
+_RESUME_LM_ADAPTERS: dict[str, str] = {}
+_RESUME_LM_ADAPTER_LOCK = threading.Lock()
+
+# 응답 캐시 설정 (환경변수로 조정). SQLite 파일은 프로젝트 루트 data/cache 아래에 둠
+_CACHE_DIR = Path(os.environ.get("SELF_INTRO_CACHE_DIR") or _SERVICE_DIR.parent / "data" / "cache")
+_CACHE_MAX_ITEMS = int(os.environ.get("SELF_INTRO_CACHE_SIZE", "256"))
+_CACHE_TTL_SECONDS = float(os.environ.get("SELF_INTRO_CACHE_TTL", "86400"))
+_CACHE_USE_SQLITE = os.environ.get("SELF_INTRO_CACHE_SQLITE", "false").lower() in ("1", "true", "yes")
+
+
+class _ResponseCache:
+    """
+    SelfIntroResponse 캐시. 메모리는 OrderedDict 기반 LRU, sqlite_path가 있으면 디스크에도 저장해 재시작 후 재사용.
+    값은 asdict(SelfIntroResponse) 형태로 보관하고, ttl 초가 지난 항목은 조회 시 삭제.
+    FastAPI 동기 엔드포인트는 스레드풀에서 돌기 때문에 모든 접근은 lock으로 직렬화.
+    """
+
+    def __init__(self, max_items: int, ttl: float, sqlite_path: Path | None = None):
+        self.max_items = max(0, max_items)
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if sqlite_path is not None:
+            try:
+                sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created_at REAL, payload TEXT)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[cache] SQLite 캐시 비활성화 (메모리만 사용): {e}")
+                self._db = None
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                if not self._expired(item[0]):
+                    self._items.move_to_end(key)
+                    return item[1]
+                del self._items[key]
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT created_at, payload FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[0]):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            payload = json.loads(row[1])
+            self._remember(key, row[0], payload)
+            return payload
+
+    def set(self, key: str, payload: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, payload)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, created_at, payload) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(payload, ensure_ascii=False)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, created_at: float, payload: dict) -> None:
+        if self.max_items == 0:
+            return
+        self._items[key] = (created_at, payload)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+
+_RESPONSE_CACHE = _ResponseCache(
+    _CACHE_MAX_ITEMS,
+    _CACHE_TTL_SECONDS,
+    _CACHE_DIR / "self_intro_responses.sqlite3" if _CACHE_USE_SQLITE else None,
+)
+
+
+class StageTimings:
+    """
+    요청 1건의 단계별 소요 시간(ms)과 토큰 수.
+    단계: cache, template, lm_load, lm_generate, openai, openai_retry, score, select, total.
+    api가 만들어 넘기면 Server-Timing 헤더로, 서비스는 요청이 끝날 때 전역 히스토그램(_METRICS)에 누적.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """with timings.stage("openai"): ... 구간의 시간을 name에 더함 (예외가 나도 기록)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def count(self, name: str, n: int) -> None:
+        """토큰 수 등 정수 카운터 누적 (예: openai_prompt_tokens, lm_new_tokens)."""
+        self.counts[name] = self.counts.get(name, 0) + int(n or 0)
+
+    def finish(self, name: str = "total") -> None:
+        """name(기본 total) = 생성 시점부터 지금까지."""
+        self.durations[name] = (time.perf_counter() - self._started) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (예: 'template;dur=3.1, openai;dur=5120.4, total;dur=5130.2')."""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.durations.items())
+
+
+class _StageMetrics:
+    """
+    단계별 소요 시간 히스토그램 + 토큰/요청 카운터. /metrics에서 Prometheus 텍스트 형식으로 노출.
+    요청(항목) 1건 단위 단계는 self_intro_stage_duration_ms, 일괄 생성의 배치 공통 단계는
+    self_intro_batch_stage_duration_ms로 분리 (배치 단위 시간이 항목 단위 p95/p99를 흐리지 않도록).
+    """
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+    _FAMILIES = (
+        ("self_intro_stage_duration_ms", "Self-intro pipeline stage latency per request in milliseconds."),
+        ("self_intro_batch_stage_duration_ms", "Self-intro batch-wide stage latency per batch call in milliseconds."),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (메트릭 이름, 단계) → 버킷 / 합 / 개수
+        self._buckets: dict[tuple[str, str], list[int]] = {}
+        self._sums: dict[tuple[str, str], float] = {}
+        self._counts: dict[tuple[str, str], int] = {}
+        self._tokens: dict[str, int] = {}
+        self._requests: dict[str, int] = {}
+
+    def _observe_durations(self, family: str, timings: StageTimings) -> None:
+        for name, ms in timings.durations.items():
+            key = (family, name)
+            buckets = self._buckets.setdefault(key, [0] * len(self.BUCKETS_MS))
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    buckets[i] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + ms
+            self._counts[key] = self._counts.get(key, 0) + 1
+        for name, n in timings.counts.items():
+            self._tokens[name] = self._tokens.get(name, 0) + n
+
+    def observe(self, timings: StageTimings, outcome: str) -> None:
+        """요청(일괄 생성이면 항목) 1건의 StageTimings를 누적. outcome: openai / lm / template / cached."""
+        with self._lock:
+            self._observe_durations("self_intro_stage_duration_ms", timings)
+            self._requests[outcome] = self._requests.get(outcome, 0) + 1
+
+    def observe_batch(self, timings: StageTimings) -> None:
+        """일괄 생성 1회의 배치 공통 단계(template, lm_*, openai_fanout, batch_total 등)를 별도 메트릭에 누적. 요청 수는 세지 않음."""
+        with self._lock:
+            self._observe_durations("self_intro_batch_stage_duration_ms", timings)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for family, help_text in self._FAMILIES:
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} histogram")
+                for key in sorted(k for k in self._buckets if k[0] == family):
+                    name = key[1]
+                    for bound, n in zip(self.BUCKETS_MS, self._buckets[key]):
+                        lines.append(f'{family}_bucket{{stage="{name}",le="{bound}"}} {n}')
+                    lines.append(f'{family}_bucket{{stage="{name}",le="+Inf"}} {self._counts[key]}')
+                    lines.append(f'{family}_sum{{stage="{name}"}} {self._sums[key]:.3f}')
+                    lines.append(f'{family}_count{{stage="{name}"}} {self._counts[key]}')
+            lines.append("# HELP self_intro_tokens_total Tokens consumed per kind (OpenAI prompt/completion, local LM new tokens).")
+            lines.append("# TYPE self_intro_tokens_total counter")
+            for name in sorted(self._tokens):
+                lines.append(f'self_intro_tokens_total{{kind="{name}"}} {self._tokens[name]}')
+            lines.append("# HELP self_intro_requests_total Completed self-intro requests by the generator that produced the draft.")
+            lines.append("# TYPE self_intro_requests_total counter")
+            for outcome in sorted(self._requests):
+                lines.append(f'self_intro_requests_total{{outcome="{outcome}"}} {self._requests[outcome]}')
+        return "\n".join(lines) + "\n"
+
+
+_METRICS = _StageMetrics()
+
+# OpenAI 서킷 브레이커 설정 (환경변수)
+_OPENAI_CB_FAILURES = int(os.environ.get("SELF_INTRO_OPENAI_CB_FAILURES", "5"))
+_OPENAI_CB_SLO_MS = float(os.environ.get("SELF_INTRO_OPENAI_SLO_MS", "20000"))
+_OPENAI_CB_RESET_SECONDS = float(os.environ.get("SELF_INTRO_OPENAI_CB_RESET", "30"))
+
+
+class _CircuitBreaker:
+    """
+    OpenAI 단계용 서킷 브레이커.
+    - closed: 정상 호출. 실패 또는 slo_ms 초과 응답이 failure_threshold번 연속이면 open
+    - open: reset_seconds 동안 호출하지 않음 (allow()가 False → 바로 LM/템플릿 폴백)
+    - half_open: open 후 reset_seconds가 지나면 요청 1건만 탐침으로 통과. 성공하면 closed, 실패하면 다시 open
+    """
+
+    STATES = ("closed", "open", "half_open")
+
+    def __init__(self, failure_threshold: int, slo_ms: float, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.slo_ms = slo_ms
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._short_circuits = 0
+        self._transitions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            print(f"[openai_breaker] {self.state} -> {state}")
+            self.state = state
+            self._transitions[state] = self._transitions.get(state, 0) + 1
+
+    def allow(self) -> bool:
+        """이번 요청이 OpenAI를 호출해도 되는지. True를 받았으면 반드시 record()로 결과를 알려야 함."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._set_state("half_open")
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._short_circuits += 1
+            return False
+
+    def record(self, success: bool | None, elapsed_ms: float) -> None:
+        """
+        OpenAI 단계 결과 반영. 성공이어도 elapsed_ms가 slo_ms를 넘으면 실패로 셈.
+        success=None은 요청 데드라인 때문에 끊긴 경우로, 상태를 바꾸지 않고 탐침 자리만 돌려줌.
+        """
+        ok = bool(success) and elapsed_ms <= self.slo_ms
+        with self._lock:
+            if success is None:
+                self._probe_in_flight = False
+                return
+            if self.state == "half_open":
+                self._probe_in_flight = False
+                if ok:
+                    self._failures = 0
+                    self._set_state("closed")
+                else:
+                    self._opened_at = time.monotonic()
+                    self._set_state("open")
+                return
+            if ok:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self.state == "closed" and self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state("open")
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP self_intro_openai_circuit_state Current OpenAI circuit breaker state (1 for the active state).",
+                "# TYPE self_intro_openai_circuit_state gauge",
+            ]
+            for state in self.STATES:
+                lines.append(f'self_intro_openai_circuit_state{{state="{state}"}} {int(self.state == state)}')
+            lines.append("# HELP self_intro_openai_circuit_transitions_total OpenAI circuit breaker transitions by target state.")
+            lines.append("# TYPE self_intro_openai_circuit_transitions_total counter")
+            for state in sorted(self._transitions):
+                lines.append(f'self_intro_openai_circuit_transitions_total{{state="{state}"}} {self._transitions[state]}')
+            lines.append("# HELP self_intro_openai_short_circuits_total Requests that skipped OpenAI because the circuit was open.")
+            lines.append("# TYPE self_intro_openai_short_circuits_total counter")
+            lines.append(f"self_intro_openai_short_circuits_total {self._short_circuits}")
+        return "\n".join(lines) + "\n"
+
+
+_OPENAI_BREAKER = _CircuitBreaker(_OPENAI_CB_FAILURES, _OPENAI_CB_SLO_MS, _OPENAI_CB_RESET_SECONDS)
+
+# 데드라인 분배: OpenAI를 쓸 예정이면 LM은 남은 시간의 이 비율까지만 사용
+_LM_DEADLINE_SHARE = 0.4
+# 스코어링·선택·직렬화 등 마무리용으로 남겨 두는 시간(초)
+_FINISH_RESERVE_SECONDS = 0.2
+# 이보다 시간이 적게 남으면 해당 단계는 시도하지 않음(초)
+_LM_MIN_SECONDS = 0.5
+_OPENAI_MIN_SECONDS = 2.0
+
+
+def _deadline_from_ms(deadline_ms: int | None) -> float | None:
+    """요청 기준 상대 시간(ms) → time.monotonic() 기준 절대 시각. None이면 데드라인 없음."""
+    return None if deadline_ms is None else time.monotonic() + deadline_ms / 1000
+
+
+def _time_left(deadline: float | None) -> float | None:
+    """데드라인까지 남은 초 (마무리 여유분 제외). 데드라인이 없으면 None."""
+    return None if deadline is None else deadline - time.monotonic() - _FINISH_RESERVE_SECONDS
+
+
+def _lm_budget(deadline: float | None) -> float | None:
+    """LM 생성에 줄 max_time. OpenAI를 호출할 수 있으면 남은 시간의 일부만, 아니면 전부."""
+    left = _time_left(deadline)
+    if left is None:
+        return None
+    openai_next = bool(os.environ.get("OPENAI_API_KEY")) and _OPENAI_BREAKER.state != "open"
+    return left * _LM_DEADLINE_SHARE if openai_next else left
+
+
+def render_metrics() -> str:
+    """누적된 단계별 히스토그램·카운터와 OpenAI 서킷 브레이커 상태를 Prometheus 텍스트 형식으로 반환 (api의 /metrics)."""
+    return _METRICS.render() + _OPENAI_BREAKER.render()
+
+
+_OPENAI_REASONING_PREFIX = "(OpenAI 재작성: 템플릿/로컬 LM 참고)"
+
+# focus → OpenAI 버전 제목
+_FOCUS_TITLES = {
+    "strength": "역량 중심",
+    "experience": "경험 중심",
+    "values": "가치관 중심",
+}
+
+
+def _outcome(response: SelfIntroResponse) -> str:
+    """메트릭용: 어떤 생성기가 최종 초안을 만들었는지."""
+    if response.cached:
+        return "cached"
+    if (response.reasoning or "").startswith(_OPENAI_REASONING_PREFIX):
+        return "openai"
+    if response.reasoning == "(학습된 모델로 생성)":
+        return "lm"
+    return "template"
 
 
 def _self_intro_input_to_dict(input_data: DataclassSelfIntroInput) -> dict:
@@ -44,32 +403,120 @@ def _self_intro_input_to_dict(input_data: DataclassSelfIntroInput) -> dict:
 
 
 def _get_resume_lm_checkpoint() -> Path | None:
-    """파인튜닝된 resume_lm 체크포인트 경로. RESUME_LM_CHECKPOINT 환경변수 우선, 없으면 checkpoints/resume_lm."""
+    """
+    파인튜닝된 resume_lm 체크포인트 경로. RESUME_LM_CHECKPOINT 환경변수 우선,
+    없으면 서빙용 export(checkpoints/resume_lm_serving, mmap 로드) → 학습 체크포인트(checkpoints/resume_lm) 순.
+    """
     path = os.environ.get("RESUME_LM_CHECKPOINT")
     if path and Path(path).exists():
         return Path(path)
+    if _DEFAULT_SERVING_CHECKPOINT.exists():
+        return _DEFAULT_SERVING_CHECKPOINT
     if _DEFAULT_CHECKPOINT.exists():
         return _DEFAULT_CHECKPOINT
     return None
 
 
-def _try_create_with_resume_lm(input_data: DataclassSelfIntroInput) -> str | None:
+def _get_resume_lm_draft_checkpoint() -> Path | None:
+    """assisted decoding용 드래프트 체크포인트. RESUME_LM_DRAFT_CHECKPOINT 우선, 없으면 checkpoints/resume_lm_draft."""
+    path = os.environ.get("RESUME_LM_DRAFT_CHECKPOINT")
+    if path and Path(path).exists():
+        return Path(path)
+    if _DEFAULT_DRAFT_CHECKPOINT.exists():
+        return _DEFAULT_DRAFT_CHECKPOINT
+    return None
+
+
+def _load_resume_lm_draft(model):
+    """드래프트 모델이 있으면 1회 로드해 재사용. 없거나 본 모델과 vocab이 맞지 않으면 None (일반 디코딩)."""
+    global _RESUME_LM_DRAFT, _RESUME_LM_DRAFT_TRIED
+    if _RESUME_LM_DRAFT_TRIED:
+        return _RESUME_LM_DRAFT
+    _RESUME_LM_DRAFT_TRIED = True
+    path = _get_resume_lm_draft_checkpoint()
+    if path is None:
+        return None
+    try:
+        from inference_resume_lm import load_draft_model
+
+        _RESUME_LM_DRAFT = load_draft_model(path, model, use_cpu=True)
+    except Exception as e:
+        print(f"[resume_lm] draft model not used, falling back to plain decoding: {e}")
+    return _RESUME_LM_DRAFT
+
+
+def _load_resume_lm(timings: StageTimings):
+    """체크포인트가 있으면 (tokenizer, model)을 전역 캐시에 로드해 반환. 없으면 None. 로드 실패는 예외 전파."""
+    global _RESUME_LM_MODEL, _RESUME_LM_TOKENIZER
+    path = _get_resume_lm_checkpoint()
+    if path is None:
+        return None
+    from inference_resume_lm import load_model
+
+    if _RESUME_LM_MODEL is None:
+        with timings.stage("lm_load"):
+            tokenizer, model = load_model(path, use_cpu=True)
+            adapters = json.loads(os.environ.get("RESUME_LM_ADAPTERS") or "{}")
+            if adapters:
+                from inference_resume_lm import attach_adapters
+
+                model = attach_adapters(model, adapters)
+                _RESUME_LM_ADAPTERS.update(adapters)
+            _load_resume_lm_draft(model)
+            _RESUME_LM_TOKENIZER, _RESUME_LM_MODEL = tokenizer, model
+    return _RESUME_LM_TOKENIZER, _RESUME_LM_MODEL
+
+
+def _pick_adapter(input_data: DataclassSelfIntroInput) -> str | None:
+    """요청 roles에 키가 포함된 첫 직무별 어댑터 이름. 없으면 None (체크포인트 기본 어댑터 또는 base)."""
+    for key in _RESUME_LM_ADAPTERS:
+        if any(key in role for role in input_data.roles):
+            return key
+    return None
+
+
+@contextmanager
+def _using_adapter(model, name: str | None):
+    """직무별 어댑터가 설정돼 있으면 락을 잡고 name 어댑터로 전환 (None이면 "default" 어댑터, 그것도 없으면 어댑터 끔)."""
+    if not _RESUME_LM_ADAPTERS:
+        yield
+        return
+    with _RESUME_LM_ADAPTER_LOCK:
+        if name is None and "default" not in model.peft_config:
+            with model.disable_adapter():
+                yield
+            return
+        model.set_adapter(name or "default")
+        yield
+
+
+def _count_lm_tokens(timings: StageTimings, tokenizer, drafts: list[str | None]) -> None:
+    """생성된 본문 토큰 수를 lm_new_tokens로 기록 (generate는 텍스트만 반환하므로 다시 토큰화)."""
+    timings.count("lm_new_tokens", sum(len(tokenizer.encode(d)) for d in drafts if d))
+
+
+def _try_create_with_resume_lm(
+    input_data: DataclassSelfIntroInput, timings: StageTimings, max_time: float | None = None
+) -> str | None:
     """
     파인튜닝 LM으로 자기소개서 본문 생성 시도.
     체크포인트 없거나 inference_resume_lm 임포트 실패 시 None 반환.
-    성공 시 생성된 텍스트(본문만) 반환.
+    성공 시 생성된 텍스트(본문만) 반환. max_time(초)이 있으면 그 안에서 생성을 끊고, 너무 짧으면 시도하지 않음.
     """
-    global _RESUME_LM_MODEL, _RESUME_LM_TOKENIZER
-    path = _get_resume_lm_checkpoint()
-    if path is None:
+    if max_time is not None and max_time < _LM_MIN_SECONDS:
         return None
     try:
-        from inference_resume_lm import load_model, generate
+        loaded = _load_resume_lm(timings)
+        if loaded is None:
+            return None
+        from inference_resume_lm import generate
 
-        if _RESUME_LM_MODEL is None:
-            _RESUME_LM_TOKENIZER, _RESUME_LM_MODEL = load_model(path, use_cpu=True)
+        tokenizer, model = loaded
         input_dict = _self_intro_input_to_dict(input_data)
-        return generate(input_dict, _RESUME_LM_TOKENIZER, _RESUME_LM_MODEL)
+        with timings.stage("lm_generate"), _using_adapter(model, _pick_adapter(input_data)):
+            draft = generate(input_dict, tokenizer, model, assistant_model=_RESUME_LM_DRAFT, max_time=max_time)
+        _count_lm_tokens(timings, tokenizer, [draft])
+        return draft
     except ModuleNotFoundError as e:
         print(f"[resume_lm] transformers not available, skipping fine-tuned LM: {e}")
         return None
@@ -78,7 +525,101 @@ def _try_create_with_resume_lm(input_data: DataclassSelfIntroInput) -> str | Non
         return None
 
 
-def create_self_introduction(request: SelfIntroRequest) -> SelfIntroResponse:
+def _try_create_with_resume_lm_batch(
+    inputs: list[DataclassSelfIntroInput], timings: StageTimings, max_time: float | None = None
+) -> list[str | None]:
+    """_try_create_with_resume_lm의 배치 버전. 모델 generate를 묶어서 호출하고, 실패 시 전부 None."""
+    if not inputs:
+        return []
+    if max_time is not None and max_time < _LM_MIN_SECONDS:
+        return [None] * len(inputs)
+    try:
+        loaded = _load_resume_lm(timings)
+        if loaded is None:
+            return [None] * len(inputs)
+        from inference_resume_lm import generate_batch
+
+        tokenizer, model = loaded
+        # 직무별 어댑터가 다르면 어댑터별로 묶어서 생성
+        groups: dict[str | None, list[int]] = {}
+        for i, x in enumerate(inputs):
+            groups.setdefault(_pick_adapter(x), []).append(i)
+        drafts: list[str] = [""] * len(inputs)
+        deadline = None if max_time is None else time.monotonic() + max_time
+        with timings.stage("lm_generate"):
+            for adapter, idxs in groups.items():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                with _using_adapter(model, adapter):
+                    group_drafts = generate_batch(
+                        [_self_intro_input_to_dict(inputs[i]) for i in idxs], tokenizer, model, max_time=remaining
+                    )
+                for i, draft in zip(idxs, group_drafts):
+                    drafts[i] = draft
+        _count_lm_tokens(timings, tokenizer, drafts)
+        return [d or None for d in drafts]
+    except ModuleNotFoundError as e:
+        print(f"[resume_lm] transformers not available, skipping fine-tuned LM: {e}")
+    except Exception as e:
+        print(f"[resume_lm] batch generation failed, fallback to other generators: {e}")
+    return [None] * len(inputs)
+
+
+def _normalize_for_key(value):
+    """캐시 키용 정규화: 문자열은 strip, 리스트는 빈 항목 제거. 순서는 초안 내용에 영향을 주므로 유지."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize_for_key(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_normalize_for_key(v) for v in value]
+        return [v for v in items if v not in ("", None)]
+    return value
+
+
+def _checkpoint_fingerprint(path: str | Path) -> str:
+    """
+    체크포인트 디렉터리의 가중치·설정·서빙 매니페스트 파일 이름·크기·mtime으로 만든 짧은 지문.
+    같은 경로에 새 체크포인트를 덮어쓰면 값이 바뀜. 요청마다 stat만 하므로 checkpoint_hash보다 훨씬 쌈.
+    """
+    root = Path(path)
+    patterns = (*_CHECKPOINT_HASH_PATTERNS, "serving_manifest.json")
+    files = sorted({p for pattern in patterns for p in root.glob(pattern) if p.is_file()})
+    h = hashlib.sha256(str(root).encode("utf-8"))
+    for p in files:
+        st = p.stat()
+        h.update(f"{p.name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _cache_key(request: SelfIntroRequest, input_data: DataclassSelfIntroInput) -> str:
+    """
+    정규화한 요청 + 생성 경로(OpenAI 모델명 또는 미사용, LM 체크포인트·LoRA 어댑터 지문)의 SHA-256.
+    language/focus는 adapter가 정규화한 값을 사용해 "Strength"와 "strength"가 같은 키가 되도록 함.
+    """
+    payload = _normalize_for_key(asdict(request))
+    payload["language"] = input_data.language
+    payload["focus"] = input_data.focus
+    openai_model = os.environ.get("OPENAI_RESUME_MODEL", "gpt-4o-mini") if os.environ.get("OPENAI_API_KEY") else None
+    checkpoint = _get_resume_lm_checkpoint()
+    adapters = json.loads(os.environ.get("RESUME_LM_ADAPTERS") or "{}") if checkpoint else {}
+    payload["_model"] = {
+        "openai": openai_model,
+        "resume_lm": _checkpoint_fingerprint(checkpoint) if checkpoint else None,
+        "adapters": {name: _checkpoint_fingerprint(p) for name, p in adapters.items()},
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def create_self_introduction(
+    request: SelfIntroRequest,
+    *,
+    use_cache: bool = True,
+    timings: StageTimings | None = None,
+    deadline_ms: int | None = None,
+) -> SelfIntroResponse:
     """
     상담 기반 요청을 받아 자기소개서 초안을 생성합니다.
     1) to_self_intro_input으로 SelfIntroInput 변환
@@ -87,111 +628,314 @@ def create_self_introduction(request: SelfIntroRequest) -> SelfIntroResponse:
 
     Args:
         request: 상담 컨텐츠, AI 분석 결과, 언어/글자수/초점 포함
+        use_cache: False면 캐시 조회·저장을 모두 건너뜀 (강제 재생성)
+        timings: 단계별 소요 시간을 받을 객체 (Server-Timing 헤더용). 없으면 내부에서 만들어 메트릭에만 누적
+        deadline_ms: 이 시간(ms) 안에 응답해야 함. 남은 시간을 LM·OpenAI 단계에 나눠 주고,
+            모자라면 해당 단계를 건너뛰어 그때까지 준비된 가장 나은 초안(OpenAI > LM > 템플릿)을 반환.
+            데드라인이 있는 요청의 결과는 캐시에 저장하지 않음 (조회는 함)
 
     Returns:
-        SelfIntroResponse: draft(본문), reasoning(선택), word_count
+        SelfIntroResponse: draft(본문), reasoning(선택), word_count, cached(캐시 응답 여부)
     """
+    if timings is None:
+        timings = StageTimings()
+    deadline = _deadline_from_ms(deadline_ms)
     input_data = to_self_intro_input(request)
 
+    key = _cache_key(request, input_data) if use_cache else None
+    hit = None
+    if key is not None:
+        with timings.stage("cache"):
+            hit = _RESPONSE_CACHE.get(key)
+    if hit is not None:
+        response = replace(SelfIntroResponse(**hit), cached=True)
+    else:
+        response, degraded = _generate(request, input_data, timings, deadline)
+        # OpenAI 실패로 폴백한 결과는 캐시하지 않음 (장애가 TTL 동안 고정되지 않도록).
+        # 데드라인이 있으면 LM이 max_time에 잘렸거나 단계를 건너뛴 결과일 수 있고 캐시 키에 데드라인이 없으므로 저장하지 않음
+        if key is not None and not degraded and deadline is None:
+            _RESPONSE_CACHE.set(key, asdict(response))
+    timings.finish()
+    _METRICS.observe(timings, _outcome(response))
+    return response
+
+
+def _generate(
+    request: SelfIntroRequest,
+    input_data: DataclassSelfIntroInput,
+    timings: StageTimings,
+    deadline: float | None = None,
+) -> tuple[SelfIntroResponse, bool]:
+    """
+    실제 생성 파이프라인 (캐시 미적용). (응답, degraded) 반환.
+    degraded는 OpenAI를 쓸 수 있었는데 실패(또는 시간 부족)해서 LM/템플릿으로 폴백했는지 여부.
+    """
     # 1) 템플릿 기반 초안은 항상 생성 (안전한 기본값)
-    template_result = generate_self_introduction(input_data)
-    template_draft = template_result.draft or ""
+    with timings.stage("template"):
+        template_result = generate_self_introduction(input_data)
 
     # 2) 파인튜닝 로컬 LM이 있으면 동일 입력으로 초안 생성 시도
-    lm_draft = _try_create_with_resume_lm(input_data)
+    lm_draft = _try_create_with_resume_lm(input_data, timings, _lm_budget(deadline))
 
-    # 3) OpenAI가 있으면, 위 1차 초안(템플릿/LM)을 "참고 초안"으로 넘겨 재작성(풍성화)
+    # 3) OpenAI 재작성 → 4) 실패/미사용 시 LM·템플릿 폴백
+    return _finish(request, input_data, template_result, lm_draft, timings, deadline)
+
+
+def _finish(
+    request: SelfIntroRequest,
+    input_data: DataclassSelfIntroInput,
+    template_result,
+    lm_draft: str | None,
+    timings: StageTimings,
+    deadline: float | None = None,
+) -> tuple[SelfIntroResponse, bool]:
+    """
+    1차 초안(템플릿/LM)이 준비된 뒤의 단계: OpenAI 재작성 시도, 안 되면 폴백 응답. (응답, degraded) 반환.
+    서킷 브레이커가 열려 있거나 데드라인까지 시간이 모자라면 OpenAI를 호출하지 않고 바로 폴백 (degraded).
+    """
     api_key = os.environ.get("OPENAI_API_KEY")
-    if api_key:
+    left = _time_left(deadline)
+    enough_time = left is None or left >= _OPENAI_MIN_SECONDS
+    if api_key and enough_time and _OPENAI_BREAKER.allow():
+        start = time.perf_counter()
+        response = None
         try:
-            model = os.environ.get("OPENAI_RESUME_MODEL", "gpt-4o-mini")
-
-            blocks: list[str] = []
-            if lm_draft:
-                blocks.append("[로컬 LM 기반 초안]\n" + lm_draft)
-            if template_draft:
-                blocks.append("[템플릿 기반 초안]\n" + template_draft)
-            base_draft = "\n\n".join(blocks).strip() if blocks else None
-
-            openai_input = OpenAISelfIntroInput(
-                roles=input_data.roles,
-                competencies=input_data.competencies,
-                background={
-                    "name": input_data.background.name,
-                    "education": input_data.background.education,
-                    "experiences": input_data.background.experiences or [],
-                    "strengths": input_data.background.strengths or [],
-                    "career_values": input_data.background.career_values,
-                },
-                counseling_content=request.counseling.content,
-                language=input_data.language,
-                focus=input_data.focus,
-                min_word_count=request.min_word_count,
-                rag_context=request.rag_context,
-                base_draft=base_draft,
+            response = _try_create_with_openai(
+                request, input_data, template_result.draft or "", lm_draft, api_key, timings,
+                None if deadline is None else deadline - _FINISH_RESERVE_SECONDS,
             )
+        finally:
+            # 데드라인 때문에 끊긴 실패는 OpenAI 장애로 세지 않음
+            cut_by_deadline = (
+                response is None and deadline is not None and time.monotonic() >= deadline - _FINISH_RESERVE_SECONDS
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _OPENAI_BREAKER.record(None if cut_by_deadline else response is not None, elapsed_ms)
+        if response is not None:
+            return response, False
+    return _fallback_response(request, input_data, template_result, lm_draft, timings), bool(api_key)
+
+
+def _score(draft: str, request: SelfIntroRequest, input_data: DataclassSelfIntroInput, focus: str) -> dict:
+    """초안 하나를 요청의 직무·역량·상담 원문·배경 기준으로 로컬 스코어링."""
+    return score_draft(
+        draft or "",
+        roles=list(input_data.roles),
+        competencies=list(input_data.competencies),
+        counseling_text=request.counseling.content,
+        background=_self_intro_input_to_dict(input_data)["background"],
+        focus=focus,
+        language=input_data.language,
+    )
 
-            result = generate_with_openai(openai_input, api_key, model=model)
-
-            # focus(strength/experience/values)에 해당하는 버전을 우선 선택
-            target_focus = input_data.focus
-            focus_map = {
-                "strength": "역량 중심",
-                "experience": "경험 중심",
-                "values": "가치관 중심",
-            }
-            target_title = focus_map.get(target_focus)
-
-            selected_version = None
-            if target_title:
-                for v in result.versions:
-                    if target_title in (v.title or ""):
-                        selected_version = v
-                        break
-
-            # 매칭 실패 시 average 최고 버전 선택
-            if selected_version is None and result.versions:
-                def _avg(ver) -> float:
-                    scoring = getattr(ver, "scoring", None) or {}
-                    try:
-                        return float(scoring.get("average") or 0)
-                    except (TypeError, ValueError):
-                        return 0.0
-
-                selected_version = max(result.versions, key=_avg)
-
-            if selected_version is not None:
-                reasoning = (result.reasoning or "").strip()
-                prefix = "(OpenAI 재작성: 템플릿/로컬 LM 참고)"
-                if prefix not in reasoning:
-                    reasoning = f"{prefix} {reasoning}".strip()
-                word_count = len((selected_version.draft or "").replace(" ", "").replace("\n", ""))
-                return SelfIntroResponse(
-                    draft=selected_version.draft,
-                    reasoning=reasoning,
-                    word_count=word_count,
-                    scoring=getattr(selected_version, "scoring", None),
-                )
-        except Exception as e:
-            print(f"OpenAI 생성 실패: {e}")
 
-    # 4) OpenAI를 못 쓰거나 실패한 경우: LM 초안이 있으면 LM, 없으면 템플릿 반환
+def _try_create_with_openai(
+    request: SelfIntroRequest,
+    input_data: DataclassSelfIntroInput,
+    template_draft: str,
+    lm_draft: str | None,
+    api_key: str,
+    timings: StageTimings,
+    deadline: float | None = None,
+) -> SelfIntroResponse | None:
+    """
+    1차 초안(템플릿/LM)을 "참고 초안"으로 넘겨 OpenAI로 재작성(풍성화).
+    focus에 맞는 버전(없으면 average 최고 버전)을 골라 반환. 실패하거나 버전이 없으면 None.
+    deadline(time.monotonic() 기준)은 generate_with_openai에 그대로 넘겨 호출 timeout·재요청 생략에 사용.
+    """
+    try:
+        model = os.environ.get("OPENAI_RESUME_MODEL", "gpt-4o-mini")
+
+        blocks: list[str] = []
+        if lm_draft:
+            blocks.append("[로컬 LM 기반 초안]\n" + lm_draft)
+        if template_draft:
+            blocks.append("[템플릿 기반 초안]\n" + template_draft)
+        base_draft = "\n\n".join(blocks).strip() if blocks else None
+
+        openai_input = OpenAISelfIntroInput(
+            roles=input_data.roles,
+            competencies=input_data.competencies,
+            background={
+                "name": input_data.background.name,
+                "education": input_data.background.education,
+                "experiences": input_data.background.experiences or [],
+                "strengths": input_data.background.strengths or [],
+                "career_values": input_data.background.career_values,
+            },
+            counseling_content=request.counseling.content,
+            language=input_data.language,
+            focus=input_data.focus,
+            min_word_count=request.min_word_count,
+            rag_context=request.rag_context,
+            base_draft=base_draft,
+        )
+
+        result = generate_with_openai(openai_input, api_key, model=model, timings=timings, deadline=deadline)
+
+        # 버전별 점수는 버전 제목의 테마(역량/경험/가치관) 기준으로 로컬 계산
+        title_focus = {title: focus for focus, title in _FOCUS_TITLES.items()}
+        with timings.stage("score"):
+            for v in result.versions:
+                focus = next((f for t, f in title_focus.items() if t in (v.title or "")), input_data.focus)
+                v.scoring = _score(v.draft, request, input_data, focus)
+
+        with timings.stage("select"):
+            selected_version = _select_version(result.versions, input_data.focus)
+        if selected_version is None:
+            return None
+        reasoning = (result.reasoning or "").strip()
+        prefix = _OPENAI_REASONING_PREFIX
+        if prefix not in reasoning:
+            reasoning = f"{prefix} {reasoning}".strip()
+        word_count = len((selected_version.draft or "").replace(" ", "").replace("\n", ""))
+        return SelfIntroResponse(
+            draft=selected_version.draft,
+            reasoning=reasoning,
+            word_count=word_count,
+            scoring=getattr(selected_version, "scoring", None),
+        )
+    except Exception as e:
+        print(f"OpenAI 생성 실패: {e}")
+        return None
+
+
+def _select_version(versions: list, target_focus: str):
+    """focus(strength/experience/values)에 맞는 제목의 버전 선택. 없으면 scoring.average 최고 버전, 버전이 없으면 None."""
+    target_title = _FOCUS_TITLES.get(target_focus)
+
+    if target_title:
+        for v in versions:
+            if target_title in (v.title or ""):
+                return v
+
+    # 매칭 실패 시 average 최고 버전 선택
+    if not versions:
+        return None
+
+    def _avg(ver) -> float:
+        scoring = getattr(ver, "scoring", None) or {}
+        try:
+            return float(scoring.get("average") or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return max(versions, key=_avg)
+
+
+def _fallback_response(
+    request: SelfIntroRequest,
+    input_data: DataclassSelfIntroInput,
+    template_result,
+    lm_draft: str | None,
+    timings: StageTimings,
+) -> SelfIntroResponse:
+    """OpenAI를 못 쓰거나 실패한 경우: LM 초안이 있으면 LM, 없으면 템플릿 반환. 어느 쪽이든 로컬 scoring 포함."""
     if lm_draft:
         word_count = len(lm_draft.replace(" ", "").replace("\n", ""))
+        with timings.stage("score"):
+            scoring = _score(lm_draft, request, input_data, input_data.focus)
         return SelfIntroResponse(
             draft=lm_draft,
             reasoning="(학습된 모델로 생성)",
             word_count=word_count,
+            scoring=scoring,
         )
 
+    template_draft = template_result.draft or ""
     word_count = len(template_draft.replace(" ", "").replace("\n", ""))
+    with timings.stage("score"):
+        scoring = _score(template_draft, request, input_data, input_data.focus)
     return SelfIntroResponse(
         draft=template_draft,
         reasoning=template_result.reasoning,
         word_count=word_count,
+        scoring=scoring,
     )
 
 
+def create_self_introductions_batch(
+    requests: list[SelfIntroRequest],
+    *,
+    max_concurrency: int = 4,
+    use_cache: bool | list[bool] = True,
+    timings: StageTimings | None = None,
+    deadline_ms: int | None = None,
+    item_deadline_ms: list[int | None] | None = None,
+) -> list[SelfIntroResponse | Exception]:
+    """
+    여러 내담자 요청을 한 번에 생성합니다. 결과는 입력 순서대로, 항목별로 SelfIntroResponse 또는 예외.
+    1) 변환·검증·캐시 조회를 항목별로 수행 (한 항목의 ValueError가 다른 항목을 막지 않음)
+    2) 템플릿 초안을 한 번에 생성하고, 로컬 LM은 generate_batch로 묶어서 호출
+    3) OpenAI 재작성은 최대 max_concurrency개 스레드로 동시에 호출
+    timings에는 배치 공통 단계(cache, template, lm_*, openai_fanout, batch_total)가 기록되어 배치용 메트릭에 따로 누적되고,
+    항목별 캐시 조회·OpenAI 호출 시간·토큰은 항목마다 요청 단위 메트릭에 누적됨 (캐시 적중 항목은 cached로 셈).
+    use_cache는 배치 전체(bool) 또는 항목별(list[bool]) 값. deadline_ms는 배치 전체 기준이고,
+    item_deadline_ms가 있으면 항목마다 둘 중 이른 쪽을 그 항목의 데드라인으로 씀. LM 배치 생성은 한 번에 돌므로
+    남은 항목 중 가장 이른 데드라인에 맞추고, OpenAI 호출과 캐시 저장 여부는 항목별 데드라인을 따름.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if timings is None:
+        timings = StageTimings()
+    batch_deadline = _deadline_from_ms(deadline_ms)
+    use_cache_flags = use_cache if isinstance(use_cache, list) else [use_cache] * len(requests)
+    item_ms = item_deadline_ms if item_deadline_ms is not None else [None] * len(requests)
+
+    results: list[SelfIntroResponse | Exception | None] = [None] * len(requests)
+    pending: list[tuple[int, SelfIntroRequest, DataclassSelfIntroInput, str | None, float | None]] = []
+    item_timings: list[StageTimings] = []
+    for i, request in enumerate(requests):
+        try:
+            input_data = to_self_intro_input(request)
+        except ValueError as e:
+            results[i] = e
+            continue
+        key = _cache_key(request, input_data) if use_cache_flags[i] else None
+        deadline = min((d for d in (batch_deadline, _deadline_from_ms(item_ms[i])) if d is not None), default=None)
+        hit = None
+        item = StageTimings()
+        if key is not None:
+            with timings.stage("cache"), item.stage("cache"):
+                hit = _RESPONSE_CACHE.get(key)
+        if hit is not None:
+            results[i] = replace(SelfIntroResponse(**hit), cached=True)
+            item.finish()
+            _METRICS.observe(item, "cached")
+            continue
+        pending.append((i, request, input_data, key, deadline))
+        item_timings.append(item)
+
+    with timings.stage("template"):
+        templates = [generate_self_introduction(input_data) for _, _, input_data, _, _ in pending]
+    lm_deadline = min((deadline for *_, deadline in pending if deadline is not None), default=None)
+    lm_drafts = _try_create_with_resume_lm_batch(
+        [input_data for _, _, input_data, _, _ in pending], timings, _lm_budget(lm_deadline)
+    )
+
+    def _run(job: int) -> tuple[SelfIntroResponse, bool]:
+        _, request, input_data, _, deadline = pending[job]
+        return _finish(request, input_data, templates[job], lm_drafts[job], item_timings[job], deadline)
+
+    with timings.stage("openai_fanout"), ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = [pool.submit(_run, job) for job in range(len(pending))]
+        for job, ((i, _, _, key, deadline), future) in enumerate(zip(pending, futures)):
+            try:
+                response, degraded = future.result()
+            except Exception as e:
+                results[i] = e
+                continue
+            if key is not None and not degraded and deadline is None:
+                _RESPONSE_CACHE.set(key, asdict(response))
+            item_timings[job].finish()
+            _METRICS.observe(item_timings[job], _outcome(response))
+            results[i] = response
+
+    timings.finish("batch_total")
+    _METRICS.observe_batch(timings)
+    return results
+
+
 def create_self_introduction_simple(
     counseling_content: str,
     roles: list[str],
@@ -10,21 +10,42 @@ examples.jsonl 데이터로 자기소개서 생성 모델 fine-tuning.
   pip install -r requirements-train.txt
   python train_resume_model.py --data data/examples.jsonl --output_dir checkpoints/resume_lm
   python train_resume_model.py --epochs 3 --batch_size 2  # GPU 메모리 적을 때
+  python train_resume_model.py --draft --teacher checkpoints/resume_lm  # assisted decoding용 소형 드래프트 모델 증류
+  python train_resume_model.py --padding pack     # 여러 예시를 max_length 블록으로 이어 붙여 패딩 없이 학습
+  python train_resume_model.py --padding dynamic  # 길이가 비슷한 예시끼리 배치, 배치 최대 길이까지만 패딩
+  python train_resume_model.py --lora --output_dir checkpoints/resume_lm_lora  # LoRA 어댑터만 학습·저장 (CPU 가능)
+  python train_resume_model.py --batch_size 1 --grad_accum 8 --gradient_checkpointing --bf16  # GPU 없는 서버에서 메모리 절약
+  python train_resume_model.py --streaming --shuffle_buffer 10000  # 대용량 jsonl: 캐시 없이 한 줄씩 읽어 바로 학습 (메모리 일정)
+  python train_resume_model.py --data data/examples_shards  # build_input_from_crawl.py shard 디렉터리 (manifest.json 순서로 읽음)
+  python train_resume_model.py --export_dir checkpoints/resume_lm_serving --export_dtype bfloat16  # 학습 후 서빙용 safetensors export
+  python train_resume_model.py --export_from checkpoints/resume_lm --export_dir checkpoints/resume_lm_serving  # 학습 없이 export만
+
+held-out 평가용으로 --eval_ratio(기본 5%) 만큼의 예시를 줄 내용 해시로 골라 학습에서 뺌 (model_validation.py eval이 같은 규칙으로 사용).
+토큰화 결과는 data/cache/ 아래 Arrow 파일로 캐시 (데이터 파일 해시 + 토크나이저 + 토큰화 옵션이 같으면 재사용, memory-map 로드).
+학습 처리량·메모리 기록은 output_dir/train_telemetry.jsonl, train_telemetry.csv (logging_steps마다 한 줄 + 마지막에 전체 합계).
 """
 from __future__ import annotations
 
 import argparse
+import csv
+import hashlib
 import json
+import math
 import os
+import re
+import shutil
+import time
 from pathlib import Path
 
+import numpy as np
 import torch
-from datasets import Dataset
+from datasets import Dataset, IterableDataset, load_from_disk
 from transformers import (
     AutoConfig,
     AutoModelForCausalLM,
     AutoTokenizer,
     Trainer,
+    TrainerCallback,
     TrainingArguments,
     default_data_collator,
 )
@@ -33,9 +54,18 @@ from transformers import (
 SCRIPT_DIR = Path(__file__).resolve().parent
 DEFAULT_DATA = SCRIPT_DIR / "data" / "examples.jsonl"
 DEFAULT_OUTPUT = SCRIPT_DIR / "checkpoints" / "resume_lm"
+DEFAULT_DRAFT_OUTPUT = SCRIPT_DIR / "checkpoints" / "resume_lm_draft"
 DEFAULT_MODEL = "skt/kogpt2-base-v2"
+DEFAULT_EVAL_RATIO = 0.05
+DEFAULT_CACHE_DIR = SCRIPT_DIR.parent / "data" / "cache"
+DEFAULT_SERVING_OUTPUT = SCRIPT_DIR / "checkpoints" / "resume_lm_serving"
+SERVING_MANIFEST = "serving_manifest.json"
+# build_input_from_crawl.py가 여러 파일 입력 시 shard 디렉터리에 쓰는 목록 파일
+SHARD_MANIFEST = "manifest.json"
+# 토큰화·마스킹·패킹 로직이 바뀌면 올려서 이전 캐시를 무효화
+TOKENIZED_CACHE_VERSION = 1
 
-# 프롬프트/완성 구분자. completion은 [자기소개서] 뒤 ~ EOS. loss는 prompt_prefix_len 이후만 계산.
+# 프롬프트/완성 구분자. completion은 [자기소개서] 뒤 ~ EOS. loss는 OUTPUT_PREFIX 뒤에서 시작하는 토큰만 계산.
 PROMPT_PREFIX = "직무·역량·배경에 따른 자기소개서 초안을 작성하세요.\n\n"
 INPUT_PREFIX = "[입력]\n"
 OUTPUT_PREFIX = "\n[자기소개서]\n"
@@ -57,15 +87,39 @@ def serialize_input(inp: dict) -> str:
     return "\n".join(parts)
 
 
+def is_heldout(line: str, eval_ratio: float) -> bool:
+    """jsonl 한 줄이 held-out(평가) 예시인지. 줄 내용 해시로 정하므로 데이터가 늘거나 순서가 바뀌어도 기존 예시의 소속은 그대로."""
+    if eval_ratio <= 0:
+        return False
+    digest = hashlib.sha1(line.strip().encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) / 0x100000000 < eval_ratio
+
+
+def data_files(path: str | Path) -> list[Path]:
+    """
+    --data 경로 → 읽을 JSONL 파일 목록. 파일이면 그 파일, build_input_from_crawl.py shard 디렉터리면 manifest.json에 적힌 순서의 shard들,
+    manifest 없는 디렉터리면 안의 *.jsonl 이름순.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return [path]
+    manifest = path / SHARD_MANIFEST
+    if manifest.exists():
+        with open(manifest, encoding="utf-8") as f:
+            return [path / shard["file"] for shard in json.load(f)["shards"]]
+    return sorted(path.glob("*.jsonl"))
+
+
 def load_examples(path: Path) -> list[dict]:
-    """JSONL 파일에서 한 줄씩 읽어 {"input", "reference"} 딕셔너리 리스트로 반환."""
+    """JSONL 파일(또는 shard 디렉터리)에서 한 줄씩 읽어 {"input", "reference"} 딕셔너리 리스트로 반환."""
     examples = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            examples.append(json.loads(line))
+    for file in data_files(path):
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                examples.append(json.loads(line))
     return examples
 
 
@@ -95,44 +149,653 @@ def tokenize_for_causal_lm(
     texts: list[str],
     max_length: int = 1024,
     prompt_prefix_len: int | None = None,
+    padding: str | bool = "max_length",
 ):
     """
     텍스트 리스트 토큰화 후 input_ids, attention_mask, labels 반환.
-    labels에서 앞쪽 prompt_prefix_len 토큰과 padding 위치는 -100으로 두어 loss 제외 (completion만 학습).
+    labels에서 prompt 구간과 padding 위치는 -100으로 두어 loss 제외 (completion만 학습).
+    prompt 구간은 예시마다 OUTPUT_PREFIX가 끝나는 글자 위치로 정하고, fast 토크나이저의 offset_mapping으로
+    "그 위치 전에 시작하는 토큰"을 배치 전체에 한 번에 마스킹. slow 토크나이저면 앞쪽 prompt_prefix_len 토큰을 마스킹.
+    padding=False면 예시마다 길이가 다른 리스트 그대로 반환 (pack_examples / pad_collator용).
     """
+    fast = getattr(tokenizer, "is_fast", False)
     out = tokenizer(
         texts,
         truncation=True,
         max_length=max_length,
-        padding="max_length",
-        return_tensors=None,
+        padding=padding or "longest",
+        return_tensors="np",
+        return_offsets_mapping=fast,
     )
     input_ids = out["input_ids"]
     attention_mask = out["attention_mask"]
-    labels = [list(ids) for ids in input_ids]
+    labels = np.where(attention_mask == 1, input_ids, -100)
 
     # prompt 구간은 -100으로 해서 loss 제외 (completion만 학습)
-    if prompt_prefix_len is None:
-        # 대략 첫 1/3을 prompt로 간주하거나, [자기소개서] 직후부터만 loss
-        prompt_prefix_len = max_length // 3
-    for i, ids in enumerate(input_ids):
-        for j in range(min(prompt_prefix_len, len(ids))):
-            labels[i][j] = -100
-        # padding 위치도 -100
-        for j in range(len(ids)):
-            if attention_mask[i][j] == 0:
-                labels[i][j] = -100
+    if fast:
+        completion_start = np.array([_completion_start_char(t) for t in texts])
+        token_start = out["offset_mapping"][:, :, 0]
+        labels[token_start < completion_start[:, None]] = -100
+    else:
+        if prompt_prefix_len is None:
+            prompt_prefix_len = max_length // 3
+        labels[:, :prompt_prefix_len] = -100
 
+    if padding:
+        return {
+            "input_ids": input_ids.tolist(),
+            "attention_mask": attention_mask.tolist(),
+            "labels": labels.tolist(),
+        }
+    lengths = attention_mask.sum(axis=1)
     return {
-        "input_ids": input_ids,
-        "attention_mask": attention_mask,
-        "labels": labels,
+        "input_ids": [row[:n].tolist() for row, n in zip(input_ids, lengths)],
+        "attention_mask": [row[:n].tolist() for row, n in zip(attention_mask, lengths)],
+        "labels": [row[:n].tolist() for row, n in zip(labels, lengths)],
+    }
+
+
+def _completion_start_char(text: str) -> int:
+    """text에서 completion이 시작하는 글자 위치 (OUTPUT_PREFIX 바로 뒤). 구분자가 없으면 0 (전체를 completion으로)."""
+    idx = text.find(OUTPUT_PREFIX)
+    return idx + len(OUTPUT_PREFIX) if idx >= 0 else 0
+
+
+def pack_examples(tokenized: dict, block_size: int, pad_token_id: int) -> dict:
+    """
+    패딩 없이 토큰화된 예시들을 순서대로 block_size 블록에 이어 붙임 (예시를 중간에서 자르지 않음, 안 들어가면 다음 블록).
+    반환 열: input_ids, labels, position_ids(예시마다 0부터), segment_ids(블록 안 예시 번호 1.., 패딩 0).
+    packed_collator가 segment_ids로 예시 경계를 넘지 않는 causal mask를 만들므로 예시를 따로 넣은 것과 같은 결과.
+    """
+    blocks: dict[str, list[list[int]]] = {"input_ids": [], "labels": [], "position_ids": [], "segment_ids": []}
+    cur: dict[str, list[int]] = {k: [] for k in blocks}
+
+    def _flush():
+        if not cur["input_ids"]:
+            return
+        pad = block_size - len(cur["input_ids"])
+        blocks["input_ids"].append(cur["input_ids"] + [pad_token_id] * pad)
+        blocks["labels"].append(cur["labels"] + [-100] * pad)
+        blocks["position_ids"].append(cur["position_ids"] + [0] * pad)
+        blocks["segment_ids"].append(cur["segment_ids"] + [0] * pad)
+        for v in cur.values():
+            v.clear()
+
+    for ids, labels in zip(tokenized["input_ids"], tokenized["labels"]):
+        ids, labels = list(ids[:block_size]), list(labels[:block_size])
+        if len(cur["input_ids"]) + len(ids) > block_size:
+            _flush()
+        segment = (cur["segment_ids"][-1] if cur["segment_ids"] else 0) + 1
+        # 예시 첫 토큰은 이전 예시 마지막 토큰에서 예측하면 안 되므로 loss 제외
+        labels[0] = -100
+        cur["input_ids"].extend(ids)
+        cur["labels"].extend(labels)
+        cur["position_ids"].extend(range(len(ids)))
+        cur["segment_ids"].extend([segment] * len(ids))
+    _flush()
+    return blocks
+
+
+def packed_collator(features: list[dict]) -> dict:
+    """
+    pack_examples 블록 배치 → segment_ids로 만든 블록 대각 causal mask [B, 1, L, L] (같은 예시 안에서만 attention).
+    bool 4D mask는 SDPA attention에서만 마스크로 해석됨 (eager는 값을 더해 버림) → --padding pack은 attn_implementation="sdpa"로 로드.
+    """
+    batch = {k: torch.tensor([f[k] for f in features]) for k in ("input_ids", "labels", "position_ids")}
+    seg = torch.tensor([f["segment_ids"] for f in features])
+    length = seg.shape[1]
+    causal = torch.tril(torch.ones(length, length, dtype=torch.bool))
+    same = (seg[:, :, None] == seg[:, None, :]) & (seg[:, :, None] != 0)
+    # 패딩 행은 자기 자신만 보게 해서 softmax가 비지 않도록
+    same |= torch.eye(length, dtype=torch.bool)
+    batch["attention_mask"] = (same & causal)[:, None]
+    return batch
+
+
+def pad_collator(pad_token_id: int, pad_to_multiple_of: int = 8):
+    """길이가 다른 예시 배치를 배치 최대 길이(pad_to_multiple_of 배수)까지만 패딩하는 collator. length 등 다른 열은 버림."""
+
+    def _collate(features: list[dict]) -> dict:
+        longest = max(len(f["input_ids"]) for f in features)
+        length = -(-longest // pad_to_multiple_of) * pad_to_multiple_of
+        batch = {"input_ids": [], "attention_mask": [], "labels": []}
+        for f in features:
+            pad = length - len(f["input_ids"])
+            batch["input_ids"].append(list(f["input_ids"]) + [pad_token_id] * pad)
+            batch["attention_mask"].append(list(f["attention_mask"]) + [0] * pad)
+            batch["labels"].append(list(f["labels"]) + [-100] * pad)
+        return {k: torch.tensor(v) for k, v in batch.items()}
+
+    return _collate
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dataset_sha256(path: str | Path) -> str:
+    """데이터 내용 해시. 파일 하나면 그 파일의 SHA-256, shard 디렉터리면 shard 이름·내용 해시를 순서대로 이은 SHA-256."""
+    files = data_files(path)
+    if not Path(path).is_dir():
+        return _file_sha256(files[0])
+    h = hashlib.sha256()
+    for file in files:
+        h.update(file.name.encode("utf-8"))
+        h.update(_file_sha256(file).encode("ascii"))
+    return h.hexdigest()
+
+
+def _iter_texts(path: str, max_reference_len: int, data_sha256: str = "", eval_ratio: float = 0.0):
+    """
+    Dataset.from_generator용: examples.jsonl(또는 shard 디렉터리의 shard들)을 한 줄씩 읽어
+    build_texts와 같은 학습 문자열을 하나씩 내보냄 (held-out 예시 제외).
+    data_sha256은 쓰지 않지만 datasets가 gen_kwargs로 중간 캐시를 구분하므로 파일 내용이 바뀌면 새로 읽게 함.
+    """
+    for file in data_files(path):
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or is_heldout(line, eval_ratio):
+                    continue
+                for text in build_texts([json.loads(line)], max_reference_len=max_reference_len):
+                    yield {"text": text}
+
+
+def _tokenize_batch(batch: dict, tokenizer, max_length: int, prompt_prefix_len: int | None, padding: str) -> dict:
+    """Dataset.map용 배치 토큰화. pack은 여기서 블록까지 만들어 행 수가 바뀜 (배치 경계에서만 블록이 끊김)."""
+    tokenized = tokenize_for_causal_lm(
+        tokenizer,
+        batch["text"],
+        max_length=max_length,
+        prompt_prefix_len=prompt_prefix_len,
+        padding="max_length" if padding == "max_length" else False,
+    )
+    real = [sum(mask) for mask in tokenized["attention_mask"]]
+    loss = [sum(1 for x in labels if x != -100) for labels in tokenized["labels"]]
+    if padding == "pack":
+        packed = pack_examples(tokenized, max_length, tokenizer.pad_token_id)
+        # 블록 단위 통계: 블록 안 segment 수만큼의 예시 통계를 첫 블록에 몰아서 기록해도 합계는 같음
+        n = len(packed["input_ids"])
+        packed["num_examples"] = [len(real)] + [0] * (n - 1)
+        packed["real_tokens"] = [sum(real)] + [0] * (n - 1)
+        packed["loss_tokens"] = [sum(loss)] + [0] * (n - 1)
+        return packed
+    if padding == "dynamic":
+        tokenized["length"] = real
+    tokenized["num_examples"] = [1] * len(real)
+    tokenized["real_tokens"] = real
+    tokenized["loss_tokens"] = loss
+    return tokenized
+
+
+def tokenized_cache_key(data_sha256: str, tokenizer, **params) -> str:
+    """데이터 파일 내용 해시 + 토크나이저(이름·크기·종류) + 토큰화 옵션 + 캐시 버전의 SHA-256."""
+    payload = {
+        "data_sha256": data_sha256,
+        "tokenizer": [tokenizer.name_or_path, len(tokenizer), type(tokenizer).__name__, tokenizer.pad_token],
+        "params": params,
+        "version": TOKENIZED_CACHE_VERSION,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_tokenized_dataset(
+    data_path: Path,
+    tokenizer,
+    *,
+    max_length: int,
+    max_reference_len: int,
+    prompt_prefix_len: int | None,
+    padding: str,
+    cache_dir: Path | None = DEFAULT_CACHE_DIR,
+    num_proc: int = 1,
+    eval_ratio: float = 0.0,
+) -> tuple[Dataset, dict]:
+    """
+    examples.jsonl → 학습용 토큰화 Dataset과 통계(num_examples, real_tokens, loss_tokens).
+    cache_dir/resume_lm_tok_<키>에 같은 키의 캐시가 있으면 memory-map으로 바로 로드하고,
+    없으면 jsonl을 스트리밍으로 읽어 num_proc개 프로세스로 토큰화한 뒤 저장.
+    작업 디렉터리는 키·프로세스별로 따로 쓰고, 결과는 임시 디렉터리에 다 쓴 뒤 os.replace로 옮기므로
+    동시에 돌거나 중간에 죽어도 반쯤 쓰인 캐시를 적중으로 보지 않음.
+    cache_dir=None이면 캐시 없이 매번 토큰화.
+    """
+    target = None
+    content_sha256 = dataset_sha256(data_path)
+    if cache_dir is not None:
+        key = tokenized_cache_key(
+            content_sha256,
+            tokenizer,
+            max_length=max_length,
+            max_reference_len=max_reference_len,
+            prompt_prefix_len=prompt_prefix_len,
+            padding=padding,
+            eval_ratio=eval_ratio,
+        )
+        target = Path(cache_dir) / f"resume_lm_tok_{key[:16]}"
+        if (target / "stats.json").exists():
+            print(f"토큰화 캐시 사용: {target}")
+            with open(target / "stats.json", encoding="utf-8") as f:
+                return load_from_disk(str(target)), json.load(f)
+
+    work_dir = Path(cache_dir) / f"_build-{key[:16]}-{os.getpid()}" if target is not None else None
+    try:
+        return _tokenize_to_cache(
+            data_path,
+            tokenizer,
+            target=target,
+            work_dir=work_dir,
+            content_sha256=content_sha256,
+            max_length=max_length,
+            max_reference_len=max_reference_len,
+            prompt_prefix_len=prompt_prefix_len,
+            padding=padding,
+            num_proc=num_proc,
+            eval_ratio=eval_ratio,
+        )
+    finally:
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _tokenize_to_cache(
+    data_path: Path,
+    tokenizer,
+    *,
+    target: Path | None,
+    work_dir: Path | None,
+    content_sha256: str,
+    max_length: int,
+    max_reference_len: int,
+    prompt_prefix_len: int | None,
+    padding: str,
+    num_proc: int,
+    eval_ratio: float,
+) -> tuple[Dataset, dict]:
+    """build_tokenized_dataset의 캐시 미스 경로. target이 있으면 임시 디렉터리에 저장한 뒤 원자적으로 옮김."""
+    texts = Dataset.from_generator(
+        _iter_texts,
+        gen_kwargs={
+            "path": str(data_path),
+            "max_reference_len": max_reference_len,
+            "data_sha256": content_sha256,
+            "eval_ratio": eval_ratio,
+        },
+        cache_dir=str(work_dir) if work_dir else None,
+    )
+    dataset = texts.map(
+        _tokenize_batch,
+        batched=True,
+        batch_size=1000,
+        num_proc=max(1, num_proc) if len(texts) > 1000 else None,
+        remove_columns=["text"],
+        fn_kwargs={
+            "tokenizer": tokenizer,
+            "max_length": max_length,
+            "prompt_prefix_len": prompt_prefix_len,
+            "padding": padding,
+        },
+        desc="토큰화",
+    )
+    stats = {
+        "num_examples": int(sum(dataset["num_examples"])),
+        "real_tokens": int(sum(dataset["real_tokens"])),
+        "loss_tokens": int(sum(dataset["loss_tokens"])),
+    }
+    dataset = dataset.remove_columns(["num_examples", "real_tokens", "loss_tokens"])
+    if target is None:
+        return dataset, stats
+
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    dataset.save_to_disk(str(tmp))
+    with open(tmp / "stats.json", "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    if not (target / "stats.json").exists():
+        shutil.rmtree(target, ignore_errors=True)  # 중간에 죽은 이전 실행이 남긴 미완성 캐시
+    try:
+        os.replace(tmp, target)
+        print(f"토큰화 캐시 저장: {target}")
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (target / "stats.json").exists():
+            raise
+        # 다른 프로세스가 먼저 같은 키의 캐시를 완성함
+    return load_from_disk(str(target)), stats
+
+
+def build_streaming_dataset(
+    data_path: Path,
+    tokenizer,
+    *,
+    max_length: int,
+    max_reference_len: int,
+    prompt_prefix_len: int | None,
+    padding: str,
+    shuffle_buffer: int = 1000,
+    seed: int = 42,
+    count: bool = True,
+    eval_ratio: float = 0.0,
+) -> tuple[IterableDataset, dict | None]:
+    """
+    examples.jsonl → 스트리밍 IterableDataset. 읽기·필터·자르기·토큰화가 모두 배치를 꺼낼 때 일어나서
+    데이터 크기와 상관없이 메모리는 shuffle_buffer개 예시 + 토큰화 배치 정도로 일정.
+    셔플은 shuffle_buffer 크기 버퍼 안에서만 일어나는 근사 셔플 (에폭마다 seed가 바뀜).
+    count=True면 학습 전에 파일을 한 번 더 훑어 행 수·토큰 통계(num_rows, num_examples, real_tokens, loss_tokens)를 셈.
+    """
+    fn_kwargs = {
+        "tokenizer": tokenizer,
+        "max_length": max_length,
+        "prompt_prefix_len": prompt_prefix_len,
+        "padding": padding,
+    }
+    stat_columns = ["num_examples", "real_tokens", "loss_tokens"]
+
+    def _texts():
+        return IterableDataset.from_generator(
+            _iter_texts,
+            gen_kwargs={"path": str(data_path), "max_reference_len": max_reference_len, "eval_ratio": eval_ratio},
+        )
+
+    stats = None
+    if count:
+        stats = {"num_rows": 0, **{k: 0 for k in stat_columns}}
+        counted = _texts().map(_tokenize_batch, batched=True, batch_size=1000, remove_columns=["text"], fn_kwargs=fn_kwargs)
+        for batch in counted.select_columns(stat_columns).iter(batch_size=1000):
+            stats["num_rows"] += len(batch["num_examples"])
+            for k in stat_columns:
+                stats[k] += int(sum(batch[k]))
+
+    dataset = _texts().shuffle(seed=seed, buffer_size=shuffle_buffer)
+    dataset = dataset.map(_tokenize_batch, batched=True, batch_size=1000, remove_columns=["text"], fn_kwargs=fn_kwargs)
+    return dataset.remove_columns(stat_columns), stats
+
+
+def _current_rss_mb() -> float:
+    """현재 프로세스 RSS(MB). Linux는 /proc/self/statm, 그 외에는 지금까지의 최대 RSS로 대신함."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def _batch_token_counts(kwargs: dict) -> tuple[int, int, int]:
+    """모델 forward 인자에서 (예시 수, 패딩 제외 토큰 수, loss 대상 토큰 수). pack 배치는 position_ids로 셈."""
+    labels = kwargs.get("labels")
+    mask = kwargs.get("attention_mask")
+    position_ids = kwargs.get("position_ids")
+    loss_tokens = int((labels != -100).sum()) if labels is not None else 0
+    if position_ids is not None and mask is not None and mask.dim() == 4:
+        # pack_examples 블록: 패딩은 블록 끝에만 있고 position_ids가 0. 마지막으로 0이 아닌 위치까지가 실제 토큰
+        nonzero = position_ids != 0
+        length = position_ids.shape[1]
+        real = torch.where(nonzero.any(dim=1), length - nonzero.flip(1).int().argmax(dim=1), 0)
+        starts = (position_ids == 0) & (torch.arange(length, device=position_ids.device)[None, :] < real[:, None])
+        return int(starts.sum()), int(real.sum()), loss_tokens
+    if mask is not None:
+        return int(mask.shape[0]), int(mask.sum()), loss_tokens
+    input_ids = kwargs.get("input_ids")
+    return (int(input_ids.shape[0]), int(input_ids.numel()), loss_tokens) if input_ids is not None else (0, 0, loss_tokens)
+
+
+class TrainingTelemetryCallback(TrainerCallback):
+    """
+    학습 처리량·자원 기록. logging_steps 구간마다 한 줄씩 output_dir/train_telemetry.jsonl, .csv에 쓰고 요약을 출력.
+    - tokens_per_sec(패딩 제외)·samples_per_sec: 모델 forward 입력에서 센 토큰·예시 수 / 구간 경과 시간
+    - data_sec / compute_sec: 이전 스텝이 끝난 뒤 다음 스텝 시작까지(배치 준비) / 스텝 시작~옵티마이저 스텝 끝(forward·backward·update)
+    - peak_rss_mb / peak_gpu_mb: 구간(first_step~step) 스텝들의 최대 RSS(스텝 끝 측정), GPU 최대 할당량.
+      GPU 최대값은 스텝 시작마다 초기화해 스텝 안(forward·backward·update)만 재고, 구간·전체는 그 최댓값으로 집계
+    - loss_token_share: 패딩 제외 토큰 중 loss 대상(completion) 비율
+    로그·체크포인트 저장 시간은 data_sec에 넣지 않음. 학습이 끝나면 scope=total 한 줄을 추가.
+    """
+
+    FIELDS = [
+        "scope", "first_step", "step", "epoch", "loss", "learning_rate",
+        "tokens_per_sec", "samples_per_sec", "data_sec", "compute_sec", "data_share",
+        "peak_rss_mb", "peak_gpu_mb", "loss_token_share", "tokens", "samples",
+    ]
+
+    def __init__(self, model):
+        self._hook = model.register_forward_pre_hook(self._count_batch, with_kwargs=True)
+        self._window = self._empty()
+        self._total = self._empty()
+        self._last_end = None
+        self._step_begin = None
+        self.jsonl_path = None
+        self.csv_path = None
+
+    @staticmethod
+    def _empty() -> dict:
+        return {
+            "first_step": None, "samples": 0, "tokens": 0, "loss_tokens": 0,
+            "data_sec": 0.0, "compute_sec": 0.0, "rss": 0.0, "gpu": 0.0,
+        }
+
+    def _count_batch(self, module, args, kwargs):
+        if not module.training:
+            return None
+        samples, tokens, loss_tokens = _batch_token_counts(kwargs)
+        for acc in (self._window, self._total):
+            acc["samples"] += samples
+            acc["tokens"] += tokens
+            acc["loss_tokens"] += loss_tokens
+        return None
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if state.is_world_process_zero:
+            out = Path(args.output_dir)
+            out.mkdir(parents=True, exist_ok=True)
+            self.jsonl_path = out / "train_telemetry.jsonl"
+            self.csv_path = out / "train_telemetry.csv"
+            self.jsonl_path.write_text("", encoding="utf-8")
+            with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=self.FIELDS).writeheader()
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._last_end = time.perf_counter()
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        for acc in (self._window, self._total):
+            if acc["first_step"] is None:
+                acc["first_step"] = state.global_step + 1
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+        self._step_begin = time.perf_counter()
+        if self._last_end is not None:
+            data_sec = self._step_begin - self._last_end
+            self._window["data_sec"] += data_sec
+            self._total["data_sec"] += data_sec
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.perf_counter()
+        if self._step_begin is not None:
+            compute_sec = now - self._step_begin
+            self._window["compute_sec"] += compute_sec
+            self._total["compute_sec"] += compute_sec
+        rss = _current_rss_mb()
+        gpu = 0.0
+        if torch.cuda.is_available():
+            gpu = torch.cuda.max_memory_allocated() / 2**20
+        for acc in (self._window, self._total):
+            acc["rss"] = max(acc["rss"], rss)
+            acc["gpu"] = max(acc["gpu"], gpu)
+        self._last_end = time.perf_counter()
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        logs = logs or {}
+        if "loss" in logs and self._window["compute_sec"] > 0:
+            self._write("window", state, self._window, logs)
+            self._window = self._empty()
+        self._last_end = time.perf_counter()
+
+    def on_save(self, args, state, control, **kwargs):
+        self._last_end = time.perf_counter()
+
+    def on_train_end(self, args, state, control, **kwargs):
+        self._hook.remove()
+        if self._total["compute_sec"] > 0:
+            self._write("total", state, self._total, {})
+
+    def _write(self, scope: str, state, acc: dict, logs: dict):
+        elapsed = acc["data_sec"] + acc["compute_sec"]
+        row = {
+            "scope": scope,
+            "first_step": acc["first_step"],
+            "step": state.global_step,
+            "epoch": round(state.epoch or 0, 4),
+            "loss": logs.get("loss"),
+            "learning_rate": logs.get("learning_rate"),
+            "tokens_per_sec": round(acc["tokens"] / elapsed, 1),
+            "samples_per_sec": round(acc["samples"] / elapsed, 3),
+            "data_sec": round(acc["data_sec"], 4),
+            "compute_sec": round(acc["compute_sec"], 4),
+            "data_share": round(acc["data_sec"] / elapsed, 4),
+            "peak_rss_mb": round(acc["rss"], 1),
+            "peak_gpu_mb": round(acc["gpu"], 1) if torch.cuda.is_available() else None,
+            "loss_token_share": round(acc["loss_tokens"] / max(acc["tokens"], 1), 4),
+            "tokens": acc["tokens"],
+            "samples": acc["samples"],
+        }
+        gpu = f", GPU {row['peak_gpu_mb']:,.0f}MB" if row["peak_gpu_mb"] is not None else ""
+        label, peak = (f"step {row['first_step']}-{row['step']}", "구간 최대") if scope == "window" else ("전체", "최대")
+        print(
+            f"[telemetry] {label}: {row['tokens_per_sec']:,.0f} tok/s, {row['samples_per_sec']:.2f} samples/s, "
+            f"데이터 대기 {row['data_share']:.1%}, loss 토큰 {row['loss_token_share']:.1%}, "
+            f"{peak} RSS {row['peak_rss_mb']:,.0f}MB{gpu}"
+        )
+        if self.jsonl_path is None:
+            return
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        with open(self.csv_path, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=self.FIELDS).writerow(row)
+
+
+def export_for_serving(model, tokenizer, export_dir: Path, *, dtype: str = "float32", source: str | None = None) -> dict:
+    """
+    서빙 전용 체크포인트 export: 가중치는 safetensors(선택 dtype), 토크나이저·config·generation_config만 저장하고
+    옵티마이저·스케줄러·trainer 상태는 넣지 않음. LoRA(PeftModel)면 base에 병합해서 저장.
+    파일별 크기·SHA-256과 dtype 등을 serving_manifest.json으로 남기며, inference_resume_lm.load_model은
+    이 파일이 있으면 mmap 로드를 씀. 반환값은 manifest dict.
+    """
+    export_dir = Path(export_dir)
+    if export_dir.exists() and any(export_dir.iterdir()):
+        if not (export_dir / SERVING_MANIFEST).exists():
+            raise FileExistsError(f"서빙 export가 아닌 파일이 있는 디렉터리입니다: {export_dir}")
+        shutil.rmtree(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    model = model.to(device="cpu", dtype=getattr(torch, dtype))
+    model.save_pretrained(export_dir, safe_serialization=True, max_shard_size="2GB")
+    tokenizer.save_pretrained(export_dir)
+
+    files = {}
+    for p in sorted(export_dir.iterdir()):
+        files[p.name] = {"bytes": p.stat().st_size, "sha256": _file_sha256(p)}
+    import transformers
+
+    manifest = {
+        "format": "safetensors",
+        "dtype": dtype,
+        "model_type": model.config.model_type,
+        "num_parameters": model.num_parameters(),
+        "source": source,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "transformers_version": transformers.__version__,
+        "torch_version": torch.__version__,
+        "files": files,
     }
+    with open(export_dir / SERVING_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    weights = sum(v["bytes"] for k, v in files.items() if k.endswith(".safetensors"))
+    print(f"서빙 체크포인트 export: {export_dir} ({dtype}, 가중치 {weights / 2**20:,.1f}MB)")
+    return manifest
+
+
+_LAYER_KEY_RE = re.compile(r"\.(h|layers|layer)\.(\d+)\.")
+
+
+def build_draft_model(teacher, num_layers: int):
+    """
+    teacher와 같은 vocab·hidden 크기에 레이어 수만 num_layers로 줄인 드래프트 모델 생성.
+    임베딩·최종 norm·lm_head는 그대로 복사하고, 레이어는 teacher에서 고르게 뽑아 초기화 (DistilGPT2 방식).
+    """
+    config = teacher.config.__class__.from_dict(teacher.config.to_dict())
+    teacher_layers = config.num_hidden_layers
+    num_layers = max(1, min(num_layers, teacher_layers))
+    config.num_hidden_layers = num_layers
+    student = AutoModelForCausalLM.from_config(config, attn_implementation=teacher.config._attn_implementation)
+
+    # 학생 레이어 j ← teacher 레이어 picks[j] (처음과 마지막 레이어 포함, 사이는 균등 간격)
+    if num_layers == 1:
+        picks = [teacher_layers - 1]
+    else:
+        picks = [round(j * (teacher_layers - 1) / (num_layers - 1)) for j in range(num_layers)]
+    teacher_state = teacher.state_dict()
+    student_state = student.state_dict()
+    for key in student_state:
+        src = key
+        m = _LAYER_KEY_RE.search(key)
+        if m:
+            src = key[: m.start()] + f".{m.group(1)}.{picks[int(m.group(2))]}." + key[m.end():]
+        if src in teacher_state and teacher_state[src].shape == student_state[key].shape:
+            student_state[key] = teacher_state[src].clone()
+    student.load_state_dict(student_state)
+    return student
+
+
+class DistillationTrainer(Trainer):
+    """
+    드래프트 모델 학습용 Trainer. loss = alpha * CE(정답) + (1 - alpha) * KL(teacher || student) * T^2.
+    KL은 labels != -100 인 completion 위치에서만 계산 (prompt·padding 제외, 본 학습과 같은 구간).
+    """
+
+    def __init__(self, *args, teacher=None, alpha: float = 0.5, temperature: float = 2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.teacher = teacher.to(self.args.device).eval()
+        for p in self.teacher.parameters():
+            p.requires_grad_(False)
+        self.alpha = alpha
+        self.temperature = temperature
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        import torch.nn.functional as F
+
+        outputs = model(**inputs)
+        with torch.no_grad():
+            teacher_logits = self.teacher(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs.get("attention_mask"),
+                position_ids=inputs.get("position_ids"),
+            ).logits
+        mask = inputs["labels"][:, 1:] != -100
+        t = self.temperature
+        student_logits = outputs.logits[:, :-1][mask] / t
+        teacher_logits = teacher_logits[:, :-1][mask] / t
+        kl = F.kl_div(
+            F.log_softmax(student_logits, dim=-1),
+            F.softmax(teacher_logits, dim=-1),
+            reduction="batchmean",
+        ) * (t * t)
+        loss = self.alpha * outputs.loss + (1 - self.alpha) * kl
+        return (loss, outputs) if return_outputs else loss
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--data", type=str, default=str(DEFAULT_DATA), help="examples.jsonl 경로")
+    parser.add_argument("--data", type=str, default=str(DEFAULT_DATA), help="examples.jsonl 경로 또는 build_input_from_crawl.py shard 디렉터리")
     parser.add_argument("--output_dir", type=str, default=str(DEFAULT_OUTPUT), help="체크포인트 저장 경로")
     parser.add_argument("--model_name", type=str, default=DEFAULT_MODEL, help="pretrained 모델명")
     parser.add_argument("--epochs", type=int, default=5)
@@ -140,59 +803,236 @@ def main():
     parser.add_argument("--lr", type=float, default=5e-5)
     parser.add_argument("--max_length", type=int, default=1024)
     parser.add_argument("--max_reference_len", type=int, default=1536, help="reference 최대 글자 수")
-    parser.add_argument("--prompt_token_len", type=int, default=180, help="prompt 구간 토큰 수 (이전은 loss 제외)")
+    parser.add_argument(
+        "--prompt_token_len",
+        type=int,
+        default=180,
+        help="slow 토크나이저일 때만: prompt 구간 토큰 수 (fast면 예시별 [자기소개서] 위치로 자동 계산)",
+    )
+    parser.add_argument(
+        "--padding",
+        choices=["max_length", "dynamic", "pack"],
+        default="max_length",
+        help="max_length: 전부 max_length까지 패딩 / dynamic: 길이별 그룹 배치 + 배치 단위 패딩 / pack: 여러 예시를 한 블록으로",
+    )
+    parser.add_argument(
+        "--eval_ratio",
+        type=float,
+        default=DEFAULT_EVAL_RATIO,
+        help="held-out 평가용으로 학습에서 뺄 예시 비율 (model_validation.py eval에도 같은 값을 줄 것, 0이면 전부 학습)",
+    )
+    parser.add_argument("--cache_dir", type=str, default=str(DEFAULT_CACHE_DIR), help="토큰화 캐시 위치")
+    parser.add_argument("--no_cache", action="store_true", help="토큰화 캐시를 쓰지 않고 매번 토큰화")
+    parser.add_argument("--num_proc", type=int, default=min(4, os.cpu_count() or 1), help="캐시가 없을 때 토큰화 프로세스 수")
+    parser.add_argument("--streaming", action="store_true", help="캐시를 만들지 않고 jsonl을 한 줄씩 읽어 토큰화하며 학습 (대용량 데이터용)")
+    parser.add_argument("--shuffle_buffer", type=int, default=1000, help="--streaming 시 셔플 버퍼 크기 (예시 수)")
+    parser.add_argument(
+        "--max_steps",
+        type=int,
+        default=-1,
+        help="--streaming 시 학습 스텝 수. 없으면 파일을 한 번 훑어 행 수를 세고 --epochs로 계산",
+    )
+    parser.add_argument("--grad_accum", type=int, default=1, help="gradient accumulation 스텝 수 (실효 배치 = batch_size × grad_accum)")
+    parser.add_argument("--gradient_checkpointing", action="store_true", help="activation을 저장하지 않고 backward 때 다시 계산 (메모리↓, 속도↓)")
+    parser.add_argument("--bf16", action="store_true", help="bf16 autocast (GPU는 지원 시, GPU가 없으면 CPU autocast)")
+    parser.add_argument("--dataloader_workers", type=int, default=0, help="DataLoader 워커 프로세스 수")
+    parser.add_argument("--lora", action="store_true", help="LoRA 어댑터만 학습하고 어댑터 가중치만 저장 (peft 필요)")
+    parser.add_argument("--lora_r", type=int, default=8, help="--lora 시 low-rank 차원")
+    parser.add_argument("--lora_alpha", type=int, default=16, help="--lora 시 스케일 (alpha / r)")
+    parser.add_argument("--lora_dropout", type=float, default=0.05)
+    parser.add_argument(
+        "--lora_target_modules",
+        type=str,
+        default=None,
+        help="--lora 시 적용할 모듈 이름 (쉼표 구분, 예: c_attn,c_proj). 없으면 모델 종류별 peft 기본값",
+    )
+    parser.add_argument("--lora_merge_dir", type=str, default=None, help="--lora 시 어댑터를 base에 합친 전체 모델도 이 경로에 저장")
+    parser.add_argument(
+        "--export_dir",
+        type=str,
+        default=None,
+        help=f"학습 후 서빙 전용 safetensors 체크포인트도 저장 (예: {DEFAULT_SERVING_OUTPUT.relative_to(SCRIPT_DIR)})",
+    )
+    parser.add_argument(
+        "--export_dtype",
+        choices=["float32", "float16", "bfloat16"],
+        default="float32",
+        help="--export_dir 가중치 dtype (CPU 서빙은 bfloat16 권장, float16은 GPU용)",
+    )
+    parser.add_argument("--export_from", type=str, default=None, help="학습 없이 이 체크포인트를 --export_dir로 export만 함")
+    parser.add_argument("--draft", action="store_true", help="assisted decoding용 소형 드래프트 모델을 teacher에서 증류")
+    parser.add_argument("--teacher", type=str, default=str(DEFAULT_OUTPUT), help="--draft 시 teacher 체크포인트 (파인튜닝된 resume_lm)")
+    parser.add_argument("--draft_layers", type=int, default=2, help="--draft 시 드래프트 모델 레이어 수")
+    parser.add_argument("--distill_alpha", type=float, default=0.5, help="--draft 시 CE loss 비중 (나머지는 KL)")
+    parser.add_argument("--distill_temperature", type=float, default=2.0, help="--draft 시 KL 온도")
     args = parser.parse_args()
+    if args.draft and args.lora:
+        parser.error("--draft와 --lora는 함께 쓸 수 없습니다.")
+    if args.draft and args.output_dir == str(DEFAULT_OUTPUT):
+        args.output_dir = str(DEFAULT_DRAFT_OUTPUT)
+    if args.export_from:
+        from inference_resume_lm import load_model
+
+        tokenizer, model = load_model(args.export_from, use_cpu=True)
+        export_for_serving(
+            model,
+            tokenizer,
+            Path(args.export_dir or DEFAULT_SERVING_OUTPUT),
+            dtype=args.export_dtype,
+            source=str(args.export_from),
+        )
+        return
 
     data_path = Path(args.data)
-    if not data_path.exists():
+    if not data_path.exists() or not data_files(data_path):
         raise FileNotFoundError(f"데이터 파일 없음: {data_path}. 먼저 build_input_from_crawl.py로 examples.jsonl을 생성하세요.")
 
-    examples = load_examples(data_path)
-    texts = build_texts(examples, max_reference_len=args.max_reference_len)
-    if not texts:
-        raise ValueError("유효한 (input, reference) 쌍이 없습니다.")
-
-    print(f"학습 샘플 수: {len(texts)}")
-    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    # 드래프트는 teacher와 같은 토크나이저를 써야 assisted decoding에서 토큰을 검증할 수 있음
+    tokenizer = AutoTokenizer.from_pretrained(args.teacher if args.draft else args.model_name)
     # KoGPT2 일부는 pad_token 없음
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
 
-    tokenized = tokenize_for_causal_lm(
-        tokenizer,
-        texts,
-        max_length=args.max_length,
-        prompt_prefix_len=args.prompt_token_len,
-    )
-    dataset = Dataset.from_dict(tokenized)
+    max_steps = -1
+    if args.streaming:
+        dataset, stats = build_streaming_dataset(
+            data_path,
+            tokenizer,
+            max_length=args.max_length,
+            max_reference_len=args.max_reference_len,
+            prompt_prefix_len=args.prompt_token_len,
+            padding=args.padding,
+            shuffle_buffer=args.shuffle_buffer,
+            count=args.max_steps <= 0,
+            eval_ratio=args.eval_ratio,
+        )
+        if args.max_steps > 0:
+            max_steps = args.max_steps
+        else:
+            max_steps = args.epochs * math.ceil(stats["num_rows"] / (args.batch_size * args.grad_accum))
+        print(f"스트리밍 학습: {max_steps} 스텝 (셔플 버퍼 {args.shuffle_buffer})")
+    else:
+        dataset, stats = build_tokenized_dataset(
+            data_path,
+            tokenizer,
+            max_length=args.max_length,
+            max_reference_len=args.max_reference_len,
+            prompt_prefix_len=args.prompt_token_len,
+            padding=args.padding,
+            cache_dir=None if args.no_cache else Path(args.cache_dir),
+            num_proc=args.num_proc,
+            eval_ratio=args.eval_ratio,
+        )
+        stats["num_rows"] = len(dataset)
+
+    # 패딩 제외 실제 토큰 수 (학습 후 유효 토큰/초 계산용). --streaming --max_steps면 미리 세지 않으므로 None
+    real_tokens = None
+    if stats is not None:
+        if not stats["num_examples"]:
+            raise ValueError("유효한 (input, reference) 쌍이 없습니다.")
+        real_tokens = stats["real_tokens"]
+        print(f"학습 샘플 수: {stats['num_examples']}")
+        print(f"loss 대상 토큰: {stats['loss_tokens']:,} / {real_tokens:,} ({stats['loss_tokens'] / max(real_tokens, 1):.1%})")
+    if args.padding == "pack":
+        data_collator = packed_collator
+        if stats is not None:
+            blocks = stats["num_rows"]
+            print(f"패킹: 예시 {stats['num_examples']}개 → {blocks}블록 (블록당 {args.max_length}토큰, 채움률 {real_tokens / (blocks * args.max_length):.1%})")
+    elif args.padding == "dynamic":
+        data_collator = pad_collator(tokenizer.pad_token_id)
+    else:
+        data_collator = default_data_collator
+
+    # packed_collator의 bool 블록 대각 mask는 SDPA에서만 올바르게 적용됨
+    attn_kwargs = {"attn_implementation": "sdpa"} if args.padding == "pack" else {}
+    teacher = None
+    if args.draft:
+        teacher = AutoModelForCausalLM.from_pretrained(args.teacher, **attn_kwargs)
+        model = build_draft_model(teacher, args.draft_layers)
+        print(
+            f"드래프트 모델: {model.config.num_hidden_layers}/{teacher.config.num_hidden_layers} 레이어, "
+            f"파라미터 {model.num_parameters():,} (teacher {teacher.num_parameters():,})"
+        )
+    else:
+        config = AutoConfig.from_pretrained(args.model_name)
+        model = AutoModelForCausalLM.from_pretrained(args.model_name, config=config, **attn_kwargs)
+        if args.lora:
+            from peft import LoraConfig, get_peft_model
 
-    config = AutoConfig.from_pretrained(args.model_name)
-    model = AutoModelForCausalLM.from_pretrained(args.model_name, config=config)
+            lora_config = LoraConfig(
+                task_type="CAUSAL_LM",
+                r=args.lora_r,
+                lora_alpha=args.lora_alpha,
+                lora_dropout=args.lora_dropout,
+                target_modules=args.lora_target_modules.split(",") if args.lora_target_modules else None,
+                # GPT-2 계열 Conv1D 가중치는 (in, out) 순서
+                fan_in_fan_out=config.model_type == "gpt2",
+            )
+            model = get_peft_model(model, lora_config)
+            model.print_trainable_parameters()
+    if args.padding == "pack" and model.config._attn_implementation != "sdpa":
+        raise ValueError(f"--padding pack은 SDPA attention이 필요합니다 (현재 {model.config._attn_implementation}).")
 
     training_args = TrainingArguments(
         output_dir=args.output_dir,
         num_train_epochs=args.epochs,
+        max_steps=max_steps,
         per_device_train_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.grad_accum,
+        gradient_checkpointing=args.gradient_checkpointing,
+        # non-reentrant: LoRA처럼 입력 임베딩이 grad를 안 받는 경우에도 동작
+        gradient_checkpointing_kwargs={"use_reentrant": False} if args.gradient_checkpointing else None,
+        dataloader_num_workers=args.dataloader_workers,
         learning_rate=args.lr,
         warmup_ratio=0.1,
         logging_steps=10,
         save_strategy="epoch",
         save_total_limit=2,
-        fp16=torch.cuda.is_available(),
+        fp16=torch.cuda.is_available() and not args.bf16,
+        bf16=args.bf16,
+        # GPU 없이 --bf16이면 CPU autocast (그 외에는 Trainer 기본 장치 선택: CUDA > MPS > CPU)
+        use_cpu=args.bf16 and not torch.cuda.is_available(),
         report_to="none",
+        # 스트리밍은 길이를 미리 알 수 없어 길이 그룹 샘플러를 못 씀 (배치 단위 패딩만 적용)
+        group_by_length=args.padding == "dynamic" and not args.streaming,
+        # segment_ids·length는 모델 forward 인자가 아니지만 collator가 써야 하므로 남겨 둠
+        remove_unused_columns=args.padding == "max_length",
     )
 
-    trainer = Trainer(
-        model=model,
-        args=training_args,
-        train_dataset=dataset,
-        data_collator=default_data_collator,
-    )
+    if teacher is not None:
+        trainer = DistillationTrainer(
+            model=model,
+            args=training_args,
+            train_dataset=dataset,
+            data_collator=data_collator,
+            callbacks=[TrainingTelemetryCallback(model)],
+            teacher=teacher,
+            alpha=args.distill_alpha,
+            temperature=args.distill_temperature,
+        )
+    else:
+        trainer = Trainer(
+            model=model,
+            args=training_args,
+            train_dataset=dataset,
+            data_collator=data_collator,
+            callbacks=[TrainingTelemetryCallback(model)],
+        )
 
-    trainer.train()
+    train_result = trainer.train()
+    runtime = train_result.metrics.get("train_runtime") or 0
+    if runtime and real_tokens is not None:
+        print(f"유효 토큰/초 (패딩 제외, --padding {args.padding}): {real_tokens * args.epochs / runtime:,.0f}")
     trainer.save_model(args.output_dir)
     tokenizer.save_pretrained(args.output_dir)
     print(f"학습 완료. 모델·토크나이저 저장: {args.output_dir}")
+    if args.lora and args.lora_merge_dir:
+        merged = trainer.model.merge_and_unload()
+        merged.save_pretrained(args.lora_merge_dir)
+        tokenizer.save_pretrained(args.lora_merge_dir)
+        print(f"LoRA 병합 모델 저장: {args.lora_merge_dir}")
+    if args.export_dir:
+        export_for_serving(trainer.model, tokenizer, Path(args.export_dir), dtype=args.export_dtype, source=args.output_dir)
 
 
 if __name__ == "__main__":
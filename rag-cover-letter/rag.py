@@ -6,6 +6,8 @@ RAG 파이프라인 + 자기소개서 초안 3종 생성 (로컬용).
 
 import os
 import re
+import sys
+from pathlib import Path
 from typing import Optional
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
@@ -22,6 +24,10 @@ try:
 except Exception:
     pass
 
+# OpenAI 호출은 mk_resume_model의 공용 레이트 리미터를 거침 (같은 저장소 체크아웃 기준, 뒤에 추가해 모듈 가림 방지)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mk_resume_model"))
+from openai_generator import estimate_tokens, get_openai_limiter  # noqa: E402
+
 # ---------- 설정 ----------
 PDF_PATH = os.environ.get("PDF_PATH", "./자소서.pdf")
 CHROMA_PERSIST_DIR = os.environ.get("CHROMA_PERSIST_DIR", "./chroma_db")
@@ -46,6 +52,7 @@ def _get_llm():
             model=OPENAI_MODEL,
             temperature=0,
             max_tokens=OPENAI_MAX_TOKENS,
+            max_retries=0,  # 재시도는 get_openai_limiter().call()이 담당
         )
     return _llm
 
@@ -220,7 +227,8 @@ def generate_drafts(
         ("system", DRAFT_SYSTEM),
         ("human", DRAFT_USER_TEMPLATE),
     ])
-    chain = prompt | _get_llm() | StrOutputParser()
+    # 리미터가 usage_metadata로 실제 토큰 수를 보정하도록 AIMessage까지만 리미터 안에서 받고, 문자열 변환은 밖에서
+    chain = prompt | _get_llm()
     inp = {
         "client_name": client_name,
         "major": major or "-",
@@ -228,7 +236,11 @@ def generate_drafts(
         "insights": insights or "(상담 분석 없음)",
         "context": context[: 8000],
     }
-    raw = chain.invoke(inp)
+    message = get_openai_limiter().call(
+        lambda: chain.invoke(inp),
+        est_tokens=estimate_tokens(DRAFT_SYSTEM, DRAFT_USER_TEMPLATE, *inp.values(), completion_tokens=OPENAI_MAX_TOKENS),
+    )
+    raw = StrOutputParser().invoke(message)
     drafts = _parse_three_drafts(raw, target_job or "직무")
 
     # 3개 미만이면 부족한 만큼 플레이스홀더 추가
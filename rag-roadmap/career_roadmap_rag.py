@@ -5,13 +5,19 @@ Supabase RAG + Tavily(기업/직무/자격증 검색) + OpenAI. Q-Net API 미사
 import os
 import json
 import re
+import sys
 from datetime import datetime
+from pathlib import Path
 import requests
 import gradio as gr
 from dotenv import load_dotenv
 from openai import OpenAI
 from supabase import create_client, Client
 
+# OpenAI 호출은 mk_resume_model의 공용 레이트 리미터를 거침 (같은 저장소 체크아웃 기준, 뒤에 추가해 모듈 가림 방지)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mk_resume_model"))
+from openai_generator import estimate_tokens, get_openai_limiter  # noqa: E402
+
 load_dotenv()
 
 # -----------------------------
@@ -26,7 +32,7 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY를 .env에 설정하세요.")
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)  # 재시도는 get_openai_limiter().call()이 담당
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
 OPENAI_ROADMAP_MODEL = os.getenv("OPENAI_ROADMAP_MODEL", "gpt-4o-mini")
@@ -224,13 +230,16 @@ def generate_career_roadmap_rag(user_data: dict, company_info_text: str, job_inf
     context = build_roadmap_user_context(
         target_job, target_company, job_info_text, company_info_text, user_data
     )
-    response = client.chat.completions.create(
-        model=OPENAI_ROADMAP_MODEL,
-        messages=[
-            {"role": "system", "content": ROADMAP_SYSTEM_PROMPT},
-            {"role": "user", "content": context},
-        ],
-        temperature=0,
+    response = get_openai_limiter().call(
+        lambda: client.chat.completions.create(
+            model=OPENAI_ROADMAP_MODEL,
+            messages=[
+                {"role": "system", "content": ROADMAP_SYSTEM_PROMPT},
+                {"role": "user", "content": context},
+            ],
+            temperature=0,
+        ),
+        est_tokens=estimate_tokens(ROADMAP_SYSTEM_PROMPT, context, completion_tokens=1500),
     )
     text = response.choices[0].message.content.strip()
     if text.startswith("```"):
@@ -273,13 +282,16 @@ def get_certifications_from_tavily(tavily_cert: dict, target_job: str, major: st
 
 위 검색 결과에 실제로 언급된 자격증만 3~5개 골라 추천해라. JSON만 출력."""
     try:
-        resp = client.chat.completions.create(
-            model=OPENAI_ROADMAP_MODEL,
-            messages=[
-                {"role": "system", "content": CERT_TAVILY_SYSTEM},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,
+        resp = get_openai_limiter().call(
+            lambda: client.chat.completions.create(
+                model=OPENAI_ROADMAP_MODEL,
+                messages=[
+                    {"role": "system", "content": CERT_TAVILY_SYSTEM},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.3,
+            ),
+            est_tokens=estimate_tokens(CERT_TAVILY_SYSTEM, user_prompt, completion_tokens=600),
         )
         text = resp.choices[0].message.content.strip()
         if text.startswith("```"):